@@ -6,8 +6,17 @@ Usa Gemini com Google Search Grounding para buscar dados em tempo real
 import os
 import sys
 import re
+import json
+import time
+import datetime
+import hashlib
 import asyncio
+import threading
+import weakref
+import argparse
+from collections import deque, OrderedDict
 import cloudscraper
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Adiciona o diretório do projeto ao sys.path
@@ -17,6 +26,33 @@ sys.path.insert(0, project_root)
 load_dotenv()
 
 import google.generativeai as genai
+from google.generativeai import caching, protos
+from google.api_core import exceptions as google_exceptions
+
+from tools.intent_router import (
+    ROUTE_LLM,
+    ROUTE_PROFILE,
+    LOCAL_ROUTES,
+    answer_locally,
+    classify_intent,
+    needs_web_search,
+    record_route,
+)
+from tools.agent_tools import LOCAL_FUNCTIONS
+from tools.intent_router import normalize_text
+from store import get_store, SESSION_IDLE_TTL
+from image_cache import proxy_image_url, original_image_url, rewrite_profile_images
+
+
+# Pool próprio para as chamadas ao Tracker.gg: buscas que estouram o prazo
+# não seguram o asyncio.run() de quem chamou (o executor padrão é aguardado no fim)
+TRACKER_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="tracker")
+
+# Tempo (segundos) que um perfil fica em cache
+PROFILE_CACHE_TTL = 300
+
+# Tempo (segundos) que uma resposta de primeira mensagem (tier list, meta) fica em cache
+ANSWER_CACHE_TTL = 600
 
 
 # --- Função para buscar perfil no Tracker.gg via API ---
@@ -43,11 +79,11 @@ def fetch_tracker_api(riot_id: str) -> dict:
                 "data": response.json()
             }
         elif response.status_code == 404:
-            return {"success": False, "error": "Perfil não encontrado. Verifique o Nick#Tag."}
+            return {"success": False, "error": "Perfil não encontrado. Verifique o Nick#Tag.", "status_code": 404}
         elif response.status_code == 403:
-            return {"success": False, "error": "Acesso bloqueado pelo Cloudflare."}
+            return {"success": False, "error": "Acesso bloqueado pelo Cloudflare.", "status_code": 403}
         else:
-            return {"success": False, "error": f"Erro HTTP {response.status_code}"}
+            return {"success": False, "error": f"Erro HTTP {response.status_code}", "status_code": response.status_code}
             
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -67,12 +103,19 @@ async def scrape_tracker_profile(riot_id: str) -> dict:
     if "#" not in riot_id:
         return {"error": "Formato inválido. Use: Nick#Tag"}
     
+    # Perfil em cache (compartilhado entre workers no modo serve.py)
+    store = get_store()
+    cache_key = riot_id.lower()
+    cached = store.get("profiles", cache_key)
+    if cached:
+        return cached["profile"]
+    
     # Executa em thread separada para não bloquear
     loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(None, fetch_tracker_api, riot_id)
+    result = await loop.run_in_executor(TRACKER_EXECUTOR, fetch_tracker_api, riot_id)
     
     if not result.get("success"):
-        return {"error": result.get("error", "Erro desconhecido")}
+        return {"error": result.get("error", "Erro desconhecido"), "status_code": result.get("status_code")}
     
     try:
         data = result["data"]["data"]
@@ -93,7 +136,7 @@ async def scrape_tracker_profile(riot_id: str) -> dict:
             "found": True,
             "name": user_handle,
             "region": region,
-            "avatar": avatar_url,
+            "avatar": proxy_image_url(avatar_url),
         }
         
         # Extrai overview stats do segmento 'season' (season atual)
@@ -104,7 +147,7 @@ async def scrape_tracker_profile(riot_id: str) -> dict:
                 # Rank
                 rank_data = stats.get("rank", {})
                 profile["rank"] = rank_data.get("metadata", {}).get("tierName", "Unranked")
-                profile["rank_icon"] = rank_data.get("metadata", {}).get("iconUrl", "")
+                profile["rank_icon"] = proxy_image_url(rank_data.get("metadata", {}).get("iconUrl", ""))
                 
                 # Peak Rank
                 peak_data = stats.get("peakRank", {})
@@ -144,7 +187,7 @@ async def scrape_tracker_profile(riot_id: str) -> dict:
                 agents.append({
                     "name": agent_meta.get("name", "Unknown"),
                     "role": agent_meta.get("role", ""),
-                    "image": agent_meta.get("imageUrl", ""),
+                    "image": proxy_image_url(agent_meta.get("imageUrl", "")),
                     "hours": agent_stats.get("timePlayed", {}).get("displayValue", "0h"),
                     "matches": agent_stats.get("matchesPlayed", {}).get("displayValue", "0"),
                     "winrate": agent_stats.get("matchesWinPct", {}).get("displayValue", "N/A"),
@@ -155,11 +198,37 @@ async def scrape_tracker_profile(riot_id: str) -> dict:
         # Ordena por horas jogadas e pega top 5
         profile["top_agents"] = agents[:5]
         
+        store.set("profiles", cache_key, {
+            "profile": profile,
+            "fetched_at": time.time(),
+            "etag": profile_etag(profile),
+        }, ttl=PROFILE_CACHE_TTL)
         return profile
         
     except Exception as e:
         return {"error": f"Erro ao processar dados: {str(e)}"}
 
+def profile_etag(profile: dict) -> str:
+    """Hash estável do conteúdo do perfil (usado como ETag)."""
+    canonical = json.dumps(profile, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+async def get_profile_entry(riot_id: str) -> dict:
+    """
+    Busca o perfil junto com os dados de cache, para a API JSON.
+    
+    Returns:
+        Dict com 'profile' e, se encontrado, 'fetched_at' e 'etag'
+    """
+    profile = await scrape_tracker_profile(riot_id)
+    if not profile.get("found"):
+        return {"profile": profile}
+    
+    entry = get_store().get("profiles", riot_id.lower())
+    return entry or {"profile": profile, "fetched_at": time.time(), "etag": profile_etag(profile)}
+
+
 # Configura API
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
@@ -183,60 +252,540 @@ def load_instruction(filename: str) -> str:
 # Carrega instrução
 SYSTEM_INSTRUCTION = load_instruction("instructions.md")
 
-# Modelo com Google Search Grounding
+# Modelo com as ferramentas locais registradas (function calling);
+# Google Search Grounding é ligado por mensagem quando a pergunta precisa da web
 model = genai.GenerativeModel(
     model_name=MODEL_NAME,
     system_instruction=SYSTEM_INSTRUCTION,
+    tools=LOCAL_FUNCTIONS,
 )
 
-# Histórico de chat por usuário
-chat_sessions = {}
+# Funções locais por nome, para executar as chamadas pedidas pelo modelo
+LOCAL_FUNCTIONS_BY_NAME = {func.__name__: func for func in LOCAL_FUNCTIONS}
+
+# Limite de idas e voltas de function calling por turno
+MAX_TOOL_ROUNDS = 4
+
+# Pool para executar as chamadas de função em paralelo
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tools")
+
+# Métricas dos últimos turnos enviados ao Gemini
+tool_turn_stats = deque(maxlen=500)
+_tool_stats_lock = threading.Lock()
+
+# Ferramentas do modo com grounding
+SEARCH_TOOLS = [{"google_search": {}}]
+
+# --- Cache de contexto do Gemini ---
+# Instrução de sistema + declarações de ferramentas ficam num CachedContent (um
+# por modo de ferramentas) em vez de irem em todo turno. Se o cache não puder
+# ser criado (ex: instrução abaixo do mínimo de tokens), segue sem cache.
+CONTEXT_CACHE_ENABLED = bool(os.getenv("GOOGLE_API_KEY")) and os.getenv("VDH_CONTEXT_CACHE", "1") != "0"
+CONTEXT_CACHE_TTL = 3600
+CONTEXT_CACHE_RETRY_AFTER = 600
+
+# modo -> (modelo, válido até, CachedContent)
+_context_caches = {}
+# Modos com CachedContent sendo criado/buscado agora (fora do lock)
+_context_cache_pending = set()
+_context_cache_lock = threading.Lock()
+
+# Histórico de chat por usuário (modo de um processo), do menos ao mais usado
+chat_sessions = OrderedDict()
+_chat_last_used = {}
+
+# Sessões de chat mantidas em memória no máximo
+MAX_CHAT_SESSIONS = 1000
+
+# A cada quantos turnos as sessões paradas são apagadas do store
+SESSION_PURGE_EVERY = 200
+_turns_since_purge = 0
+
+
+def get_cached_model(mode: str):
+    """
+    Retorna um modelo apoiado no CachedContent do modo ("functions" ou "search").
+    
+    As chamadas à API (get/create) rodam fora do lock; enquanto uma thread cria
+    o cache do modo, as outras seguem sem cache em vez de esperar.
+    
+    Returns:
+        GenerativeModel ou None se o cache estiver desligado/indisponível
+    """
+    if not CONTEXT_CACHE_ENABLED:
+        return None
+    
+    now = time.time()
+    with _context_cache_lock:
+        cached_model, valid_until, _ = _context_caches.get(mode, (None, 0, None))
+        if now < valid_until:
+            return cached_model
+        if mode in _context_cache_pending:
+            return None
+        _context_cache_pending.add(mode)
+    
+    store = get_store()
+    entry = (None, now + CONTEXT_CACHE_RETRY_AFTER, None)
+    try:
+        # Reaproveita o cache criado por outro worker, se ainda existir
+        cached = None
+        name = store.get("gemini_cache", mode)
+        if name:
+            try:
+                cached = caching.CachedContent.get(name)
+            except Exception as e:
+                if not is_missing_cache_error(e):
+                    raise
+                store.delete("gemini_cache", mode)
+        if cached is None:
+            cached = caching.CachedContent.create(
+                model=f"models/{MODEL_NAME}",
+                display_name=f"vdh-{mode}",
+                system_instruction=SYSTEM_INSTRUCTION,
+                tools=LOCAL_FUNCTIONS if mode == "functions" else SEARCH_TOOLS,
+                ttl=datetime.timedelta(seconds=CONTEXT_CACHE_TTL),
+            )
+            store.set("gemini_cache", mode, cached.name, ttl=CONTEXT_CACHE_TTL - 120)
+        entry = (genai.GenerativeModel.from_cached_content(cached), cached.expire_time.timestamp() - 120, cached)
+    except Exception:
+        pass
+    finally:
+        with _context_cache_lock:
+            _context_caches[mode] = entry
+            _context_cache_pending.discard(mode)
+    return entry[0]
+
+
+def is_missing_cache_error(error: Exception) -> bool:
+    """Erro de CachedContent expirado/apagado na API (não conta 429, bloqueio de segurança etc.)."""
+    if isinstance(error, google_exceptions.NotFound):
+        return True
+    cache_errors = (google_exceptions.PermissionDenied, google_exceptions.InvalidArgument, google_exceptions.FailedPrecondition)
+    return isinstance(error, cache_errors) and "cache" in str(error).lower()
+
+
+def invalidate_cached_model(mode: str) -> None:
+    """Esquece o cache do modo e apaga o CachedContent antigo na API."""
+    with _context_cache_lock:
+        _, _, cached = _context_caches.pop(mode, (None, 0, None))
+    if cached is None:
+        return
+    store = get_store()
+    # Outro worker pode já ter trocado o cache compartilhado por um novo
+    if store.get("gemini_cache", mode) == cached.name:
+        store.delete("gemini_cache", mode)
+    try:
+        cached.delete()
+    except Exception:
+        # Já expirou ou foi apagado por outro worker
+        pass
+
+
+def send_turn(chat, content, mode: str, tools: list):
+    """
+    Envia uma mensagem no chat usando o cache de contexto do modo, se houver.
+    
+    O modelo com cache recebe o mesmo histórico e o histórico resultante volta
+    para o chat da sessão. Se o cache tiver expirado na API, ele é apagado e o
+    turno vai sem cache.
+    """
+    cached_model = get_cached_model(mode)
+    if cached_model is not None:
+        try:
+            cached_chat = cached_model.start_chat(history=chat.history)
+            response = cached_chat.send_message(content)
+            chat.history = cached_chat.history
+            return response
+        except Exception as e:
+            # Só cache expirado/apagado cai para o envio sem cache; 429 e
+            # bloqueios se repetiriam ali e seguem para os fallbacks do turno
+            if not is_missing_cache_error(e):
+                raise
+            invalidate_cached_model(mode)
+    return chat.send_message(content, tools=tools)
+
+
+def get_usage(response) -> dict:
+    """Tokens de prompt (total e vindos de cache) de uma resposta."""
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+    }
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token)."""
+    return len(text) // 4
+
+
+def record_turn(mode: str, tool_calls: int, started_at: float, usage: dict = None, context_tokens_saved: int = 0) -> None:
+    """Registra chamadas de função, latência e tokens de prompt de um turno."""
+    usage = usage or {}
+    with _tool_stats_lock:
+        tool_turn_stats.append({
+            "mode": mode,
+            "tool_calls": tool_calls,
+            "latency_ms": round((time.perf_counter() - started_at) * 1000, 1),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "cached_tokens": usage.get("cached_tokens", 0),
+            "context_tokens_saved": context_tokens_saved,
+        })
+
+
+def get_tool_stats() -> dict:
+    """Resumo por modo (functions/search/...) dos últimos turnos, com economia de tokens."""
+    with _tool_stats_lock:
+        turns = list(tool_turn_stats)
+    
+    summary = {}
+    for mode in sorted({t["mode"] for t in turns}):
+        mode_turns = [t for t in turns if t["mode"] == mode]
+        latencies = sorted(t["latency_ms"] for t in mode_turns)
+        summary[mode] = {
+            "turns": len(mode_turns),
+            "tool_calls": sum(t["tool_calls"] for t in mode_turns),
+            "avg_tool_calls": round(sum(t["tool_calls"] for t in mode_turns) / len(mode_turns), 2),
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 1),
+            "p95_latency_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "avg_prompt_tokens": round(sum(t["prompt_tokens"] for t in mode_turns) / len(mode_turns), 1),
+            "avg_cached_tokens": round(sum(t["cached_tokens"] for t in mode_turns) / len(mode_turns), 1),
+            "avg_context_tokens_saved": round(sum(t["context_tokens_saved"] for t in mode_turns) / len(mode_turns), 1),
+        }
+    return {"turns": len(turns), "modes": summary, "recent": turns[-10:]}
+
+
+def get_function_calls(response) -> list:
+    """Extrai as chamadas de função pedidas na resposta do modelo."""
+    try:
+        parts = response.candidates[0].content.parts
+    except (IndexError, AttributeError):
+        return []
+    return [part.function_call for part in parts if part.function_call.name]
+
+
+def has_function_call(content) -> bool:
+    return any(part.function_call.name for part in getattr(content, "parts", []))
+
+
+def drop_unanswered_function_call(chat) -> None:
+    """
+    Remove do fim do histórico um turno que parou num pedido de função.
+    
+    Acontece quando um turno abandonado (prazo) termina em background com um
+    function_call que ninguém respondeu; o Gemini recusa o histórico assim.
+    """
+    history = list(chat.history)
+    if not history or not has_function_call(history[-1]):
+        return
+    for index in range(len(history) - 1, -1, -1):
+        item = history[index]
+        if item.role == "user" and not any(part.function_response.name for part in item.parts):
+            chat.history = history[:index]
+            return
+    chat.history = []
+
+
+async def execute_function_calls(function_calls: list) -> list:
+    """Executa as chamadas de função em paralelo e monta as respostas para o modelo."""
+    loop = asyncio.get_event_loop()
+    
+    async def run_one(function_call):
+        args = type(function_call).to_dict(function_call).get("args") or {}
+        func = LOCAL_FUNCTIONS_BY_NAME.get(function_call.name)
+        if func is None:
+            result = {"error": f"Ferramenta '{function_call.name}' não encontrada"}
+        else:
+            try:
+                result = await loop.run_in_executor(TOOL_EXECUTOR, lambda: func(**args))
+            except Exception as e:
+                result = {"error": str(e)}
+        return protos.Part(function_response=protos.FunctionResponse(
+            name=function_call.name,
+            response={"result": result},
+        ))
+    
+    return list(await asyncio.gather(*(run_one(fc) for fc in function_calls)))
+
+
+async def send_with_local_tools(chat, content, deadline=None) -> tuple:
+    """
+    Envia a mensagem com as funções locais e roda o loop de function calling aqui.
+    
+    Returns:
+        (texto da resposta, total de chamadas de função executadas, uso de tokens somado)
+    
+    Raises:
+        DeadlineExceeded / RequestCancelled: se o prazo do pedido acabar ou o cliente sair
+        RuntimeError: se o modelo continuar pedindo funções após MAX_TOOL_ROUNDS
+    """
+    response = await run_blocking(deadline, chat, send_turn, chat, content, "functions", LOCAL_FUNCTIONS)
+    usage = get_usage(response)
+    tool_calls = 0
+    
+    for _ in range(MAX_TOOL_ROUNDS):
+        function_calls = get_function_calls(response)
+        if not function_calls:
+            break
+        tool_calls += len(function_calls)
+        function_responses = await execute_function_calls(function_calls)
+        response = await run_blocking(deadline, chat, send_turn, chat, function_responses, "functions", LOCAL_FUNCTIONS)
+        for key, value in get_usage(response).items():
+            usage[key] += value
+    
+    if get_function_calls(response):
+        raise RuntimeError(f"O modelo ainda pedia funções após {MAX_TOOL_ROUNDS} rodadas")
+    
+    return response.text, tool_calls, usage
+
+
+# Riot ID no formato Nick#Tag
+RIOT_ID_PATTERN = re.compile(r'([A-Za-z0-9_]+#[A-Za-z0-9_]+)')
+
+# Prazo total (segundos) para buscar todos os perfis de uma mensagem
+PROFILE_FETCH_DEADLINE = 10
+
+# --- Prazo por pedido ---
+# Orçamento total de uma mensagem; cada etapa recebe uma fatia do que sobrou
+REQUEST_DEADLINE = 30
+
+# Fração do tempo restante que a busca de perfis pode usar antes do Gemini
+PROFILE_BUDGET_SHARE = 0.4
+
+# Abaixo disso não vale começar outra chamada ao Gemini (ex: o retry sem grounding)
+MIN_STAGE_BUDGET = 1.0
+
+# Intervalo para checar se o cliente desconectou
+CANCEL_POLL_INTERVAL = 0.1
+
+# Chamadas ao Gemini rodam fora do event loop para poderem ser abandonadas
+LLM_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="gemini")
+
+# Chamada abandonada (prazo/desconexão) que ainda roda, por sessão de chat
+_abandoned_turns = weakref.WeakKeyDictionary()
+
+
+class DeadlineExceeded(Exception):
+    """O orçamento de tempo do pedido acabou."""
+
+
+class RequestCancelled(Exception):
+    """O cliente desconectou antes da resposta."""
+
+
+class Deadline:
+    """Orçamento de tempo de um pedido, com verificação de desconexão do cliente."""
+
+    def __init__(self, budget: float = REQUEST_DEADLINE, is_cancelled=None):
+        self.expires_at = time.monotonic() + budget
+        self.is_cancelled = is_cancelled or (lambda: False)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def share(self, fraction: float, cap: float = None) -> float:
+        """Fatia do tempo restante para uma etapa."""
+        budget = self.remaining() * fraction
+        return min(budget, cap) if cap is not None else budget
+
+
+async def wait_cancellable(futures, timeout: float, is_cancelled=None):
+    """
+    asyncio.wait com prazo que também para se o cliente desconectar.
+    
+    Returns:
+        (concluídos, pendentes), como asyncio.wait
+    
+    Raises:
+        RequestCancelled: se is_cancelled() ficar verdadeiro durante a espera
+    """
+    ends_at = time.monotonic() + timeout
+    pending = set(futures)
+    while pending:
+        if is_cancelled and is_cancelled():
+            raise RequestCancelled()
+        remaining = ends_at - time.monotonic()
+        if remaining <= 0:
+            break
+        _, pending = await asyncio.wait(pending, timeout=min(remaining, CANCEL_POLL_INTERVAL))
+    return set(futures) - pending, pending
+
+
+async def run_blocking(deadline, chat, func, *args):
+    """
+    Roda uma chamada bloqueante ao Gemini dentro do prazo do pedido.
+    
+    A requisição HTTP em andamento não tem como ser interrompida: se o prazo
+    acabar ou o cliente sair, ela termina em background e o próximo turno da
+    mesma sessão espera por ela antes de mexer no histórico.
+    """
+    if deadline is None:
+        return func(*args)
+    
+    await settle_abandoned_turn(chat, deadline)
+    return await wait_future(deadline, chat, LLM_EXECUTOR.submit(func, *args))
+
+
+async def settle_abandoned_turn(chat, deadline) -> None:
+    """Espera a chamada abandonada do turno anterior desta sessão, se ainda estiver rodando."""
+    previous = _abandoned_turns.pop(chat, None)
+    if previous is not None and not previous.done() and deadline is not None:
+        await wait_future(deadline, chat, previous)
+
+
+async def wait_future(deadline, chat, future):
+    """Espera um Future do executor respeitando prazo e desconexão."""
+    wrapped = asyncio.wrap_future(future)
+    try:
+        done, _ = await wait_cancellable([wrapped], deadline.remaining(), deadline.is_cancelled)
+    except RequestCancelled:
+        done = None
+    if not done:
+        _abandoned_turns[chat] = future
+        # Solta o Future do event loop (que pode fechar antes da chamada terminar)
+        wrapped.cancel()
+        if done is None:
+            raise RequestCancelled()
+        raise DeadlineExceeded()
+    return wrapped.result()
+
+
+_sessions_lock = threading.Lock()
 
 
 def get_chat(user_id: str):
-    """Retorna ou cria uma sessão de chat para o usuário."""
-    if user_id not in chat_sessions:
-        chat_sessions[user_id] = model.start_chat(history=[])
-    return chat_sessions[user_id]
+    """
+    Retorna ou cria uma sessão de chat para o usuário.
+    
+    No modo multi-worker o histórico vem do store compartilhado, já que o turno
+    anterior pode ter rodado em outro processo.
+    """
+    store = get_store()
+    if store.shared:
+        purge_idle_sessions(store)
+        history = [protos.Content.from_json(item) for item in store.load_history(user_id)]
+        return model.start_chat(history=history)
+    
+    with _sessions_lock:
+        if user_id not in chat_sessions:
+            chat_sessions[user_id] = model.start_chat(history=[])
+        chat_sessions.move_to_end(user_id)
+        _chat_last_used[user_id] = time.time()
+        chat = chat_sessions[user_id]
+    purge_idle_sessions(store)
+    return chat
 
 
-async def process_message(user_id: str, message: str, image_data: bytes = None):
+def purge_idle_sessions(store) -> None:
     """
-    Processa uma mensagem do usuário.
+    Esquece sessões paradas há mais de SESSION_IDLE_TTL (e as mais antigas além
+    de MAX_CHAT_SESSIONS); de tempos em tempos limpa também o store.
+    """
+    global _turns_since_purge
+    cutoff = time.time() - SESSION_IDLE_TTL
+    evicted = []
+    with _sessions_lock:
+        while chat_sessions:
+            oldest = next(iter(chat_sessions))
+            if len(chat_sessions) <= MAX_CHAT_SESSIONS and _chat_last_used.get(oldest, 0) >= cutoff:
+                break
+            chat_sessions.popitem(last=False)
+            _chat_last_used.pop(oldest, None)
+            evicted.append(oldest)
+        _turns_since_purge += 1
+        purge_store = _turns_since_purge >= SESSION_PURGE_EVERY
+        if purge_store:
+            _turns_since_purge = 0
+    
+    # O contexto marcado como enviado só vale enquanto o histórico existir
+    for user_id in evicted:
+        store.delete("session_context", user_id)
+    if purge_store:
+        store.purge(SESSION_IDLE_TTL)
+
+
+def save_chat(user_id: str, chat) -> None:
+    """Persiste o histórico no store compartilhado (só no modo multi-worker)."""
+    store = get_store()
+    if store.shared:
+        store.save_history(user_id, [type(item).to_json(item) for item in chat.history])
+
+
+def get_session_lock(user_id: str):
+    """
+    Retorna o lock que serializa os turnos de uma sessão.
+    
+    ChatSession não é thread-safe: turnos da mesma sessão rodam em ordem,
+    sessões diferentes rodam em paralelo (entre workers, via store compartilhado).
+    """
+    return get_store().session_lock(user_id)
+
+
+def reset_chat(user_id: str) -> None:
+    """Descarta o histórico de chat do usuário."""
+    with _sessions_lock:
+        chat_sessions.pop(user_id, None)
+        _chat_last_used.pop(user_id, None)
+    store = get_store()
+    store.delete_history(user_id)
+    store.delete("session_context", user_id)
+
+
+def extract_riot_ids(message: str) -> list:
+    """Extrai todos os Riot IDs da mensagem, sem repetição e na ordem em que aparecem."""
+    riot_ids = []
+    seen = set()
+    for riot_id in RIOT_ID_PATTERN.findall(message):
+        if riot_id.lower() not in seen:
+            seen.add(riot_id.lower())
+            riot_ids.append(riot_id)
+    return riot_ids
+
+
+async def fetch_profiles(riot_ids: list, deadline: float = PROFILE_FETCH_DEADLINE, is_cancelled=None) -> dict:
+    """
+    Busca vários perfis em paralelo, com um prazo único para todos.
     
     Args:
-        user_id: ID do usuário
-        message: Texto da mensagem
-        image_data: Bytes da imagem (opcional)
+        riot_ids: Lista de IDs Riot
+        deadline: Tempo máximo (segundos) para o conjunto todo
+        is_cancelled: Função que diz se o cliente desconectou (opcional)
     
     Returns:
-        Resposta do agente
+        Dict riot_id -> perfil (ou {"error": ...} para os que falharam/estouraram o prazo)
     """
-    chat = get_chat(user_id)
+    if not riot_ids:
+        return {}
     
-    # Detecta se é busca EXPLÍCITA de perfil
-    riot_id_match = re.search(r'([A-Za-z0-9_]+#[A-Za-z0-9_]+)', message)
+    tasks = {riot_id: asyncio.ensure_future(scrape_tracker_profile(riot_id)) for riot_id in riot_ids}
+    try:
+        done, pending = await wait_cancellable(tasks.values(), deadline, is_cancelled)
+    except RequestCancelled:
+        for task in tasks.values():
+            task.cancel()
+        raise
     
-    # Só busca perfil automaticamente se:
-    # 1. A mensagem for APENAS o Nick#Tag (com espaços opcionais)
-    # 2. OU tiver palavras de busca explícita como "buscar", "perfil", "stats", "estatísticas"
-    is_profile_only = riot_id_match and message.strip().lower() == riot_id_match.group(1).lower()
-    search_keywords = ["buscar", "perfil", "stats", "estatísticas", "estatisticas", "procurar", "ver perfil", "dados de", "info de"]
-    is_explicit_search = riot_id_match and any(kw in message.lower() for kw in search_keywords)
+    for task in pending:
+        task.cancel()
     
-    if (is_profile_only or is_explicit_search) and not image_data:
-        riot_id = riot_id_match.group(1)
-        
-        # Busca perfil no Tracker.gg via API
-        profile = await scrape_tracker_profile(riot_id)
-        
-        if profile.get("found"):
-            # Formata resposta bonita com os dados da API
-            encoded_id = riot_id.replace("#", "%23")
-            
-            season_info = f" ({profile.get('season')})" if profile.get('season') else ""
-            
-            response_text = f"""📊 **Estatísticas de {profile['name']}**{season_info}
+    profiles = {}
+    for riot_id, task in tasks.items():
+        if task in done and not task.cancelled() and task.exception() is None:
+            profiles[riot_id] = task.result()
+        elif task in done and not task.cancelled():
+            profiles[riot_id] = {"error": str(task.exception())}
+        else:
+            profiles[riot_id] = {"error": "Tempo esgotado ao buscar perfil."}
+    return profiles
+
+
+def format_profile_card(profile: dict, riot_id: str) -> str:
+    """Formata o perfil completo de um jogador em markdown."""
+    encoded_id = riot_id.replace("#", "%23")
+    
+    season_info = f" ({profile.get('season')})" if profile.get('season') else ""
+    
+    response_text = f"""📊 **Estatísticas de {profile['name']}**{season_info}
 
 🌍 **Região:** {profile.get('region', 'N/A')}
 
@@ -261,48 +810,183 @@ async def process_message(user_id: str, message: str, image_data: bytes = None):
 • **Aces:** {profile.get('aces', 'N/A')}
 • **Clutches:** {profile.get('clutches', 'N/A')}
 • **Tempo Jogado:** {profile.get('time_played', 'N/A')}"""
-            
-            # Adiciona agentes favoritos
-            if profile.get('top_agents'):
-                response_text += "\n\n🎭 **Agentes Mais Jogados:**"
-                for i, agent in enumerate(profile['top_agents'][:5], 1):
-                    response_text += f"\n{i}. **{agent['name']}** ({agent.get('role', '')}) - {agent['matches']} partidas | K/D: {agent['kd']} | WR: {agent['winrate']} | HS: {agent['hs']}"
-            
-            response_text += f"\n\n🔗 [Ver perfil completo](https://tracker.gg/valorant/profile/riot/{encoded_id}/overview)"
-            
-            return response_text
-        
-        elif profile.get("error"):
-            error_msg = profile["error"]
-            encoded_id = riot_id.replace("#", "%23")
-            
-            return f"""❌ **Erro ao buscar perfil:** {error_msg}
+    
+    # Adiciona agentes favoritos
+    if profile.get('top_agents'):
+        response_text += "\n\n🎭 **Agentes Mais Jogados:**"
+        for i, agent in enumerate(profile['top_agents'][:5], 1):
+            response_text += f"\n{i}. **{agent['name']}** ({agent.get('role', '')}) - {agent['matches']} partidas | K/D: {agent['kd']} | WR: {agent['winrate']} | HS: {agent['hs']}"
+    
+    response_text += f"\n\n🔗 [Ver perfil completo](https://tracker.gg/valorant/profile/riot/{encoded_id}/overview)"
+    
+    return response_text
+
+
+def format_partial_answer(profiles: dict) -> str:
+    """Resposta parcial quando o prazo acaba antes do Gemini: só os dados já buscados."""
+    cards = [format_profile_card(profile, riot_id) for riot_id, profile in profiles.items() if profile.get("found")]
+    notice = "⏱️ A análise demorou mais que o esperado e foi interrompida."
+    if not cards:
+        return f"{notice} Tente novamente em instantes."
+    return f"{notice} Enquanto isso, aqui estão os dados dos jogadores:\n\n" + "\n\n---\n\n".join(cards)
+
+
+def format_profile_error(error_msg: str, riot_id: str) -> str:
+    """Formata a mensagem de erro de busca de perfil."""
+    encoded_id = riot_id.replace("#", "%23")
+    
+    return f"""❌ **Erro ao buscar perfil de {riot_id}:** {error_msg}
 
 🔗 [Tente acessar diretamente no Tracker.gg](https://tracker.gg/valorant/profile/riot/{encoded_id}/overview)
 
 💡 **Dica:** Verifique se o Nick#Tag está correto e se o perfil está público."""
-    
-    # Se tem Nick#Tag mas NÃO é busca explícita, busca dados para contexto
-    player_context = ""
-    if riot_id_match and not is_profile_only and not is_explicit_search:
-        riot_id = riot_id_match.group(1)
-        profile = await scrape_tracker_profile(riot_id)
+
+
+def player_context_lines(profiles: dict) -> dict:
+    """Uma linha compacta de contexto por jogador encontrado (chave: riot_id em minúsculas)."""
+    lines = {}
+    for riot_id, profile in profiles.items():
+        if not profile.get("found"):
+            continue
+        top_agents = profile.get('top_agents', [])
+        agents_str = ", ".join([f"{a['name']} (K/D: {a['kd']}, WR: {a['winrate']})" for a in top_agents[:3]])
+        line = (
+            f"• {profile['name']} | Rank: {profile.get('rank', 'N/A')} | K/D: {profile.get('kd', 'N/A')} | "
+            f"WR: {profile.get('winrate', 'N/A')} | Agentes: {agents_str}"
+        )
         
-        if profile.get("found"):
-            # Formata contexto do jogador para o Gemini usar na análise
-            top_agents = profile.get('top_agents', [])
-            agents_str = ", ".join([f"{a['name']} (K/D: {a['kd']}, WR: {a['winrate']})" for a in top_agents[:3]])
-            
-            player_context = f"""
-
-[CONTEXTO DO JOGADOR - USE PARA PERSONALIZAR A RECOMENDAÇÃO]
-Jogador: {profile['name']}
-Rank: {profile.get('rank', 'N/A')}
-K/D Geral: {profile.get('kd', 'N/A')}
-Win Rate: {profile.get('winrate', 'N/A')}
-Agentes mais jogados: {agents_str}
+        # Forma recente, se o histórico de partidas já foi ingerido (não busca nada aqui)
+        aggregates = get_store().get("match_aggregates", riot_id.lower())
+        if aggregates and aggregates.get("recent"):
+            recent = aggregates["recent"]
+            wins = sum(1 for m in recent if m["won"])
+            line += f" | Últimas {len(recent)}: {wins}V-{len(recent) - wins}D"
+        
+        lines[riot_id.lower()] = line
+    return lines
+
+
+def wrap_player_context(lines) -> str:
+    """Monta o bloco de contexto enviado junto com a mensagem."""
+    if not lines:
+        return ""
+    
+    players = "\n".join(lines)
+    return f"""
+
+[CONTEXTO DOS JOGADORES - USE PARA PERSONALIZAR A RECOMENDAÇÃO]
+{players}
 [FIM DO CONTEXTO - NÃO MOSTRE ESSES DADOS BRUTOS, USE PARA DAR RECOMENDAÇÕES PERSONALIZADAS]
 """
+
+
+def format_player_context(profiles: dict) -> str:
+    """Junta os perfis encontrados em um único bloco compacto de contexto para o Gemini."""
+    return wrap_player_context(list(player_context_lines(profiles).values()))
+
+
+def select_player_context(user_id: str, chat, profiles: dict):
+    """
+    Contexto dos jogadores só com o que a sessão ainda não mandou ao Gemini.
+    
+    Jogadores cujo contexto (mesmos números) já está no histórico do chat não são
+    reenviados; o modelo continua vendo a linha original no histórico.
+    
+    Returns:
+        (bloco de contexto, linhas novas para marcar como enviadas, tokens economizados)
+    """
+    lines = player_context_lines(profiles)
+    sent = (get_store().get("session_context", user_id) or {}) if chat.history else {}
+    
+    pending = {}
+    saved = []
+    for key, line in lines.items():
+        digest = hashlib.sha256(line.encode("utf-8")).hexdigest()[:16]
+        if sent.get(key) == digest:
+            saved.append(line)
+        else:
+            pending[key] = digest
+    
+    new_lines = [lines[key] for key in pending]
+    # Sem linhas novas o bloco inteiro (com cabeçalho) deixa de ser enviado
+    skipped = wrap_player_context(saved) if not new_lines else "\n".join(saved)
+    return wrap_player_context(new_lines), pending, estimate_tokens(skipped)
+
+
+def mark_player_context_sent(user_id: str, pending: dict) -> None:
+    """Guarda quais linhas de contexto já estão no histórico da sessão."""
+    if not pending:
+        return
+    store = get_store()
+    sent = store.get("session_context", user_id) or {}
+    sent.update(pending)
+    store.set("session_context", user_id, sent, ttl=SESSION_IDLE_TTL)
+
+
+async def process_message(user_id: str, message: str, image_data: bytes = None, deadline: Deadline = None):
+    """
+    Processa uma mensagem do usuário.
+    
+    Args:
+        user_id: ID do usuário
+        message: Texto da mensagem
+        image_data: Bytes da imagem (opcional)
+        deadline: Orçamento de tempo do pedido (padrão: REQUEST_DEADLINE)
+    
+    Returns:
+        Resposta do agente (parcial se o prazo acabar antes do Gemini)
+    
+    Raises:
+        RequestCancelled: se o cliente desconectar no meio do turno
+    """
+    deadline = deadline or Deadline()
+    chat = get_chat(user_id)
+    
+    # Detecta todos os Nick#Tag da mensagem
+    riot_ids = extract_riot_ids(message)
+    
+    # Só mostra o perfil completo se:
+    # 1. A mensagem tiver APENAS Nick#Tag (com espaços/vírgulas opcionais)
+    # 2. OU tiver palavras de busca explícita como "buscar", "perfil", "stats", "estatísticas"
+    is_profile_only = bool(riot_ids) and not re.search(r'[A-Za-z0-9]', RIOT_ID_PATTERN.sub('', message))
+    search_keywords = ["buscar", "perfil", "stats", "estatísticas", "estatisticas", "procurar", "ver perfil", "dados de", "info de"]
+    is_explicit_search = bool(riot_ids) and any(kw in message.lower() for kw in search_keywords)
+    
+    if (is_profile_only or is_explicit_search) and not image_data:
+        record_route(ROUTE_PROFILE)
+        
+        # Busca todos os perfis no Tracker.gg em paralelo
+        profiles = await fetch_profiles(
+            riot_ids, deadline=deadline.share(1.0, PROFILE_FETCH_DEADLINE), is_cancelled=deadline.is_cancelled
+        )
+        
+        cards = []
+        for riot_id, profile in profiles.items():
+            if profile.get("found"):
+                cards.append(format_profile_card(profile, riot_id))
+            else:
+                cards.append(format_profile_error(profile.get("error", "Erro desconhecido"), riot_id))
+        
+        return "\n\n---\n\n".join(cards)
+    
+    # Perguntas determinísticas são respondidas pelas ferramentas locais
+    if not riot_ids and not image_data:
+        intent = classify_intent(message)
+        if intent["route"] in LOCAL_ROUTES:
+            record_route(intent["route"])
+            return answer_locally(intent)
+    
+    # Se tem Nick#Tag mas NÃO é busca explícita, busca dados de todos para contexto
+    player_context = ""
+    pending_context = {}
+    context_tokens_saved = 0
+    profiles = {}
+    if riot_ids:
+        # Os perfis usam só parte do orçamento; o resto fica para o Gemini
+        profiles = await fetch_profiles(
+            riot_ids, deadline=deadline.share(PROFILE_BUDGET_SHARE, PROFILE_FETCH_DEADLINE), is_cancelled=deadline.is_cancelled
+        )
+        player_context, pending_context, context_tokens_saved = select_player_context(user_id, chat, profiles)
     
     # Monta conteúdo para Gemini
     content = []
@@ -324,25 +1008,264 @@ Agentes mais jogados: {agents_str}
     if not content:
         return "Envie uma mensagem ou imagem."
     
+    record_route(ROUTE_LLM)
+    history_size = len(chat.history)
+    started_at = time.perf_counter()
     try:
-        # Envia com grounding habilitado
-        response = chat.send_message(
-            content,
-            tools=[{"google_search": {}}],  # Habilita busca na web
+        response_text = await send_to_gemini(
+            chat, content, message, image_data, player_context, context_tokens_saved, deadline
         )
+    except DeadlineExceeded:
+        # Sem tempo para o Gemini: devolve o que já foi buscado em vez de um erro
+        record_turn("partial", 0, started_at)
+        response_text = format_partial_answer(profiles)
+    save_chat(user_id, chat)
+    # Só marca o contexto como enviado se o turno entrou no histórico
+    if len(chat.history) > history_size:
+        mark_player_context_sent(user_id, pending_context)
+    return response_text
+
+
+async def send_to_gemini(chat, content: list, message: str, image_data: bytes, player_context: str,
+                         context_tokens_saved: int = 0, deadline: Deadline = None) -> str:
+    """
+    Envia o turno ao Gemini: funções locais, grounding ou resposta em cache.
+    
+    Raises:
+        DeadlineExceeded / RequestCancelled: se o prazo acabar ou o cliente sair
+    """
+    started_at = time.perf_counter()
+    
+    # Histórico limpo antes do turno: cada fallback recomeça dele, sem o turno
+    # do usuário repetido nem function_call sem resposta
+    await settle_abandoned_turn(chat, deadline)
+    drop_unanswered_function_call(chat)
+    history_before = list(chat.history)
+    
+    # Composição, roles e mapas: funções locais, sem busca na web
+    if not needs_web_search(message, has_image=bool(image_data)):
+        try:
+            response_text, tool_calls, usage = await send_with_local_tools(chat, content, deadline)
+            record_turn("functions", tool_calls, started_at, usage, context_tokens_saved)
+            return response_text
+        except (DeadlineExceeded, RequestCancelled):
+            raise
+        except Exception:
+            # Se o function calling falhar, segue para o caminho com grounding
+            chat.history = list(history_before)
+    
+    # Primeira mensagem sem imagem/contexto (ex: tier list): a resposta não depende
+    # do histórico, então pode ser reaproveitada entre sessões e workers
+    store = get_store()
+    answer_key = None
+    if not image_data and not player_context and not chat.history:
+        answer_key = hashlib.sha256(normalize_text(message).strip().encode("utf-8")).hexdigest()
+        cached_answer = store.get("answers", answer_key)
+        if cached_answer:
+            chat.history = [
+                protos.Content(role="user", parts=[protos.Part(text=message)]),
+                protos.Content(role="model", parts=[protos.Part(text=cached_answer)]),
+            ]
+            record_turn("cache", 0, started_at)
+            return cached_answer
+    
+    try:
+        # Envia com grounding habilitado
+        response = await run_blocking(deadline, chat, send_turn, chat, content, "search", SEARCH_TOOLS)
+        record_turn("search", 0, started_at, get_usage(response), context_tokens_saved)
+        if answer_key:
+            store.set("answers", answer_key, response.text, ttl=ANSWER_CACHE_TTL)
         return response.text
+    except (DeadlineExceeded, RequestCancelled):
+        raise
     except Exception as e:
-        # Tenta sem grounding se falhar
+        # Tenta sem grounding se falhar (e se ainda houver tempo)
+        chat.history = list(history_before)
+        if deadline is not None and deadline.remaining() < MIN_STAGE_BUDGET:
+            raise DeadlineExceeded()
         try:
-            response = chat.send_message(content)
+            # tools=[]: sem ferramentas, o modelo só pode responder com texto
+            response = await run_blocking(deadline, chat, lambda: chat.send_message(content, tools=[]))
+            record_turn("plain", 0, started_at, get_usage(response), context_tokens_saved)
             return response.text
+        except (DeadlineExceeded, RequestCancelled):
+            raise
         except Exception as e2:
+            chat.history = list(history_before)
             return f"Erro: {str(e2)}"
 
 
+# --- Modo batch (CLI) ---
+# Quantas mensagens do batch rodam ao mesmo tempo por padrão
+BATCH_WORKERS = 4
+
+
+def parse_batch_items(lines) -> list:
+    """
+    Lê os itens do batch: uma pergunta ou Riot ID por linha.
+    
+    Linhas vazias e comentários (#...) são ignorados; linhas JSON
+    ({"id": ..., "message": ...}) permitem escolher o id do item.
+    
+    Raises:
+        ValueError: linha JSON inválida ou sem 'message'
+    """
+    items = []
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Linha {line_number}: JSON inválido ({e.msg})")
+            if not data.get("message"):
+                raise ValueError(f"Linha {line_number}: falta o campo 'message'")
+            items.append({"id": str(data.get("id", len(items))), "message": data["message"]})
+        else:
+            items.append({"id": str(len(items)), "message": line})
+    return items
+
+
+async def run_batch_item(index: int, item: dict, semaphore: asyncio.Semaphore, budget: float) -> dict:
+    """Roda um item do batch numa sessão própria e mede fila e processamento."""
+    queued_at = time.perf_counter()
+    async with semaphore:
+        started_at = time.perf_counter()
+        result = {"index": index, "id": item["id"], "message": item["message"]}
+        user_id = f"batch-{os.getpid()}-{index}"
+        try:
+            result["response"] = await process_message(user_id, item["message"], deadline=Deadline(budget))
+            result["ok"] = True
+        except Exception as e:
+            result["ok"] = False
+            result["error"] = str(e)
+        finally:
+            reset_chat(user_id)
+        finished_at = time.perf_counter()
+    
+    # Perfis estruturados (do cache preenchido pelo próprio turno) para relatórios.
+    # O relatório é lido fora do servidor: imagens com a URL original do CDN, não /img/
+    riot_ids = extract_riot_ids(item["message"])
+    if riot_ids:
+        store = get_store()
+        result["profiles"] = {}
+        for riot_id in riot_ids:
+            cached = store.get("profiles", riot_id.lower())
+            result["profiles"][riot_id] = rewrite_profile_images(cached["profile"], original_image_url) if cached else None
+    
+    result["queue_ms"] = round((started_at - queued_at) * 1000, 1)
+    result["elapsed_ms"] = round((finished_at - started_at) * 1000, 1)
+    return result
+
+
+async def run_batch(items: list, output, workers: int = BATCH_WORKERS, budget: float = REQUEST_DEADLINE) -> dict:
+    """
+    Processa os itens em paralelo (até `workers` por vez) e escreve um JSON por linha.
+    
+    As linhas saem na ordem em que os itens terminam; use 'index' para reordenar.
+    
+    Returns:
+        Resumo: total, ok, erros, tempo total e latência p50/p95 por item (ms)
+    """
+    semaphore = asyncio.Semaphore(max(1, workers))
+    started_at = time.perf_counter()
+    tasks = [asyncio.ensure_future(run_batch_item(i, item, semaphore, budget)) for i, item in enumerate(items)]
+    
+    latencies = []
+    errors = 0
+    for next_done in asyncio.as_completed(tasks):
+        result = await next_done
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+        latencies.append(result["elapsed_ms"])
+        errors += not result["ok"]
+    
+    latencies.sort()
+    return {
+        "items": len(items),
+        "ok": len(items) - errors,
+        "errors": errors,
+        "workers": workers,
+        "wall_ms": round((time.perf_counter() - started_at) * 1000, 1),
+        "p50_ms": latencies[len(latencies) // 2] if latencies else 0,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0,
+    }
+
+
+def run_batch_cli(args) -> int:
+    """Modo batch: python agent.py --batch consultas.txt [--workers 8] [--output saida.jsonl]"""
+    try:
+        source = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+    except OSError as e:
+        print(f"❌ Não foi possível abrir {args.batch}: {e.strerror}", file=sys.stderr)
+        return 1
+    try:
+        items = parse_batch_items(source)
+    except (ValueError, UnicodeDecodeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    
+    try:
+        output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    except OSError as e:
+        print(f"❌ Não foi possível criar {args.output}: {e.strerror}", file=sys.stderr)
+        return 1
+    try:
+        summary = asyncio.run(run_batch(items, output, workers=args.workers, budget=args.deadline))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    
+    print(
+        f"📊 {summary['ok']}/{summary['items']} ok em {summary['wall_ms'] / 1000:.1f}s "
+        f"({summary['workers']} workers, p50 {summary['p50_ms']:.0f}ms, p95 {summary['p95_ms']:.0f}ms)",
+        file=sys.stderr,
+    )
+    return 0 if summary["errors"] == 0 else 2
+
+
+def positive_int(value: str) -> int:
+    """Tipo do argparse para --workers: inteiro >= 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"deve ser um inteiro >= 1: {value}")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """Tipo do argparse para --deadline: segundos > 0."""
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"deve ser um número > 0: {value}")
+    return number
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Valorant Draft Helper (CLI)")
+    parser.add_argument("--batch", metavar="ARQUIVO", help="Processa perguntas/Riot IDs (uma por linha) sem interação; '-' lê do stdin")
+    parser.add_argument("--workers", type=positive_int, default=BATCH_WORKERS, help="Itens do batch processados ao mesmo tempo")
+    parser.add_argument("--output", default="-", help="Arquivo JSONL de saída do batch ('-' = stdout)")
+    parser.add_argument("--deadline", type=positive_float, default=REQUEST_DEADLINE, help="Prazo por item (segundos)")
+    return parser
+
+
 # --- Execução CLI ---
 if __name__ == '__main__':
-    import asyncio
+    args = build_arg_parser().parse_args()
+    
+    if args.batch:
+        sys.exit(run_batch_cli(args))
     
     print("=" * 50)
     print("🎮 VALORANT DRAFT HELPER")
@@ -1,9 +1,21 @@
 """
 Interface Web para o Valorant Draft Helper
 """
+import io
 import os
+import re
+import gzip
+import json
+import time
+import uuid
 import asyncio
-from flask import Flask, render_template, request, jsonify
+import hmac
+import hashlib
+import socket
+import mimetypes
+import threading
+from flask import Flask, render_template, request, jsonify, g, abort, Response, stream_with_context, send_file
+from werkzeug.security import safe_join
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,27 +24,211 @@ load_dotenv()
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from agent import process_message
+from image_cache import decode_image_token, get_image, rewrite_profile_images, IMAGE_FRESH_TTL
+import profiling
+from agent import (
+    process_message, get_session_lock, reset_chat, get_profile_entry, PROFILE_CACHE_TTL,
+    Deadline, RequestCancelled, REQUEST_DEADLINE,
+)
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
-# Histórico da conversa
-conversation_history = []
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- Assets estáticos versionados ---
+# /assets/style.<hash>.css: o hash muda junto com o conteúdo, então o navegador
+# pode guardar o arquivo para sempre; gzip/brotli são gerados uma vez por versão
+ASSETS_MAX_AGE = 365 * 24 * 3600
+ASSET_COMPRESS_MIN_SIZE = 512
+
+# style.<hash12>.css -> ("style", "<hash12>", ".css")
+ASSET_URL_PATTERN = re.compile(r'^(?P<base>.+)\.(?P<hash>[0-9a-f]{12})(?P<ext>\.[A-Za-z0-9]+)$')
+
+# Sufixo do ETag por codificação: cada corpo comprimido é uma representação diferente
+ASSET_ETAG_SUFFIX = {'identity': '', 'gzip': '-gz', 'br': '-br'}
+
+_assets = {}
+_assets_lock = threading.Lock()
+
+
+def build_asset(name: str) -> dict:
+    """Lê o arquivo de static/, calcula o hash e pré-comprime (refeito se o arquivo mudar)."""
+    path = os.path.join(app.static_folder, name)
+    mtime = os.path.getmtime(path)
+    
+    with _assets_lock:
+        asset = _assets.get(name)
+        if asset and asset["mtime"] == mtime:
+            return asset
+    
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    base, ext = os.path.splitext(name)
+    url_name = f"{base}.{digest[:12]}{ext}"
+    
+    asset = {
+        "mtime": mtime,
+        "url_name": url_name,
+        "etag": digest[:32],
+        "mimetype": mimetypes.guess_type(name)[0] or 'application/octet-stream',
+        "identity": data,
+        "gzip": gzip.compress(data, compresslevel=9, mtime=0),
+        "br": brotli.compress(data, quality=11) if brotli else None,
+    }
+    with _assets_lock:
+        _assets[name] = asset
+    return asset
+
+
+@app.template_global()
+def asset_url(name: str) -> str:
+    """URL versionada de um arquivo de static/ (usar nos templates)."""
+    return f"/assets/{build_asset(name)['url_name']}"
+
+
+def preferred_encoding(available: list) -> str:
+    """Escolhe a melhor codificação aceita pelo cliente entre as disponíveis."""
+    accepted = request.accept_encodings
+    for encoding in available:
+        if accepted[encoding]:
+            return encoding
+    return 'identity'
+
+
+@app.route('/assets/<path:url_name>')
+def serve_asset(url_name):
+    """
+    Serve um asset versionado, pré-comprimido, com cache imutável.
+    
+    O nome do arquivo sai da própria URL: qualquer worker serve o asset, mesmo
+    sem ter renderizado a página que gerou o link.
+    """
+    match = ASSET_URL_PATTERN.match(url_name)
+    if match is None:
+        abort(404)
+    name = match['base'] + match['ext']
+    if safe_join(app.static_folder, name) is None or not os.path.isfile(os.path.join(app.static_folder, name)):
+        abort(404)
+    
+    asset = build_asset(name)
+    if asset["url_name"] != url_name:
+        # Versão antiga: o arquivo mudou desde que a URL foi gerada
+        abort(404)
+    
+    encodings = [e for e in ('br', 'gzip') if asset[e] and len(asset["identity"]) >= ASSET_COMPRESS_MIN_SIZE]
+    encoding = preferred_encoding(encodings)
+    
+    response = Response(asset[encoding], mimetype=asset["mimetype"])
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f'public, max-age={ASSETS_MAX_AGE}, immutable'
+    response.set_etag(asset["etag"] + ASSET_ETAG_SUFFIX[encoding])
+    return response.make_conditional(request)
+
+
+# Respostas JSON dessas rotas são comprimidas com gzip quando o cliente aceita
+GZIP_JSON_PATHS = ('/chat', '/tool/')
+GZIP_MIN_SIZE = 512
+
+
+@app.after_request
+def gzip_json_response(response):
+    if (
+        not request.path.startswith(GZIP_JSON_PATHS)
+        or response.mimetype != 'application/json'
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or not request.accept_encodings['gzip']
+    ):
+        return response
+    
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+    
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+# Cookie que identifica a sessão de cada navegador
+SESSION_COOKIE = 'vdh_session'
+SESSION_MAX_AGE = 30 * 24 * 3600
+
+
+def get_session_id() -> str:
+    """Retorna o ID de sessão do cookie, criando um novo se não existir."""
+    if 'session_id' not in g:
+        session_id = request.cookies.get(SESSION_COOKIE, '')
+        if len(session_id) != 32 or not session_id.isalnum():
+            session_id = uuid.uuid4().hex
+            g.new_session = True
+        g.session_id = session_id
+    return g.session_id
+
+
+@app.after_request
+def set_session_cookie(response):
+    if g.get('new_session'):
+        response.set_cookie(SESSION_COOKIE, g.session_id, max_age=SESSION_MAX_AGE, httponly=True, samesite='Lax')
+    return response
 
 
 @app.route('/')
 def index():
+    get_session_id()
     return render_template('index.html')
 
 
+def client_disconnected_check():
+    """
+    Função que diz se o cliente fechou a conexão deste pedido.
+    
+    Espia o socket sem consumir dados: recv vazio = conexão fechada. Fora do
+    servidor do werkzeug (ex: test_client) nunca cancela.
+    """
+    sock = request.environ.get('werkzeug.socket')
+    # MSG_DONTWAIT não existe no Windows: lá o pedido só para no prazo
+    if sock is None or not hasattr(socket, 'MSG_DONTWAIT'):
+        return lambda: False
+    
+    def disconnected():
+        try:
+            return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError:
+            return True
+    return disconnected
+
+
+def request_budget(data: dict) -> float:
+    """Prazo do pedido em segundos: o do cliente ('deadline'), limitado ao padrão do servidor."""
+    try:
+        budget = float(data.get('deadline') or REQUEST_DEADLINE)
+    except (TypeError, ValueError):
+        budget = REQUEST_DEADLINE
+    return max(1.0, min(budget, REQUEST_DEADLINE))
+
+
 @app.route('/chat', methods=['POST'])
 def chat():
-    global conversation_history
+    session_id = get_session_id()
     
     data = request.json
     message = data.get('message', '')
     image_data = data.get('image', None)
     
+    # O prazo começa a contar já na chegada (inclui a espera pelo lock da sessão)
+    deadline = Deadline(request_budget(data), client_disconnected_check())
+    
     try:
         # Processa imagem se existir
         image_bytes = None
@@ -43,32 +239,250 @@ def chat():
                 image_data = image_data.split(',')[1]
             image_bytes = base64.b64decode(image_data)
         
-        # Executa agente
-        response_text = asyncio.run(process_message(
-            user_id="web_user",
-            message=message,
-            image_data=image_bytes
-        ))
-        
-        # Salva no histórico
-        conversation_history.append({"role": "user", "message": message})
-        conversation_history.append({"role": "assistant", "message": response_text})
+        # Executa agente (um turno por vez dentro da mesma sessão)
+        with profiling.profile_request(), get_session_lock(session_id):
+            response_text = asyncio.run(process_message(
+                user_id=session_id,
+                message=message,
+                image_data=image_bytes,
+                deadline=deadline
+            ))
         
         return jsonify({"response": response_text})
     
+    except RequestCancelled:
+        # Ninguém vai ler a resposta; 499 só aparece no log
+        return '', 499
+    
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
 
+def absolute_image_urls(profile: dict) -> dict:
+    """Troca os caminhos /img/ do perfil por URLs absolutas (clientes da API fora do site)."""
+    base = request.host_url.rstrip('/')
+    
+    def absolute(url):
+        return base + url if url and url.startswith('/img/') else url
+    
+    return rewrite_profile_images(profile, absolute)
+
+
+@app.route('/api/profile/<path:riot_id>', methods=['GET'])
+def api_profile(riot_id):
+    """
+    Perfil em JSON (Nick#Tag com o # codificado como %23).
+    
+    Responde com ETag estável e Cache-Control ligado ao TTL do cache de perfis;
+    If-None-Match com o mesmo ETag recebe 304 sem corpo.
+    """
+    riot_id = riot_id.strip()
+    if "#" not in riot_id:
+        return jsonify({"error": "Formato inválido. Use: Nick%23Tag"}), 400
+    
+    entry = asyncio.run(get_profile_entry(riot_id))
+    profile = entry["profile"]
+    
+    if not profile.get("found"):
+        status = 404 if profile.get("status_code") == 404 else 502
+        response = jsonify({"error": profile.get("error", "Erro desconhecido")})
+        response.status_code = status
+        response.cache_control.no_store = True
+        return response
+    
+    response = jsonify(absolute_image_urls(profile))
+    response.set_etag(entry["etag"])
+    response.cache_control.public = True
+    response.cache_control.max_age = max(0, int(entry["fetched_at"] + PROFILE_CACHE_TTL - time.time()))
+    return response.make_conditional(request)
+
+
+@app.route('/img/<token>', methods=['GET'])
+def proxied_image(token):
+    """
+    Imagem do Tracker.gg servida pelo cache local (URLs reescritas nos perfis).
+    
+    ?w=64 pede uma miniatura (larguras em image_cache.THUMBNAIL_WIDTHS).
+    """
+    url = decode_image_token(token)
+    if url is None:
+        abort(404)
+    
+    image = get_image(url, request.args.get('w', type=int))
+    if "error" in image:
+        response = jsonify({"error": image["error"]})
+        response.status_code = 404 if image.get("status_code") == 404 else 502
+        response.cache_control.no_store = True
+        return response
+    
+    response = Response(image["data"], mimetype=image["content_type"])
+    # Conteúdo de terceiros: o navegador não adivinha o tipo nem roda nada dele
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['Content-Security-Policy'] = "default-src 'none'; sandbox"
+    response.set_etag(image["etag"])
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGE_FRESH_TTL
+    return response.make_conditional(request)
+
+
+@app.route('/api/matches/<path:riot_id>', methods=['GET'])
+def api_matches(riot_id):
+    """
+    Estatísticas por agente, por mapa e forma recente a partir do histórico
+    de partidas (Nick#Tag com o # codificado como %23). Só as partidas novas
+    desde a última chamada são buscadas, dentro de REQUEST_DEADLINE ("partial":
+    true se o prazo acabar antes do fim).
+    """
+    from match_history import ingest_match_history, summarize_aggregates
+    
+    riot_id = riot_id.strip()
+    if "#" not in riot_id:
+        return jsonify({"error": "Formato inválido. Use: Nick%23Tag"}), 400
+    
+    result = ingest_match_history(riot_id, budget=REQUEST_DEADLINE)
+    summary = summarize_aggregates(result["aggregates"])
+    summary["new_matches"] = result["new_matches"]
+    summary["partial"] = result.get("partial", False)
+    
+    if result.get("error"):
+        summary["error"] = result["error"]
+        if not summary["matches"]:
+            return jsonify(summary), 502
+    return jsonify(summary)
+
+
 @app.route('/clear', methods=['POST'])
 def clear_history():
-    global conversation_history
-    conversation_history = []
+    session_id = get_session_id()
+    with get_session_lock(session_id):
+        reset_chat(session_id)
     return jsonify({"status": "ok"})
 
 
+@app.route('/stats/routes', methods=['GET'])
+def route_stats():
+    """Quantas requisições cada rota (local, perfil, Gemini) atendeu (neste worker, no serve.py)"""
+    from tools.intent_router import get_route_stats
+    return jsonify(get_route_stats())
+
+
+@app.route('/stats/tools', methods=['GET'])
+def tool_stats():
+    """Chamadas de função e latência por turno enviado ao Gemini (neste worker, no serve.py)"""
+    from agent import get_tool_stats
+    return jsonify(get_tool_stats())
+
+
+# Token das rotas /admin/ (sem a variável, as rotas respondem 404)
+ADMIN_TOKEN_ENV = 'VDH_ADMIN_TOKEN'
+
+
+def require_admin():
+    """Aborta com 404 se o pedido não trouxer o token de admin (Authorization: Bearer ...)."""
+    expected = os.getenv(ADMIN_TOKEN_ENV)
+    provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not expected or not hmac.compare_digest(provided.encode(), expected.encode()):
+        abort(404)
+
+
+@app.route('/admin/profile', methods=['GET'])
+def admin_profile_status():
+    """Captura ativa, capturas terminadas (arquivos para download) e estado do tracemalloc"""
+    require_admin()
+    return jsonify(profiling.get_status())
+
+
+@app.route('/admin/profile/start', methods=['POST'])
+def admin_profile_start():
+    """Perfila os próximos N /chat: {"mode": "cprofile" | "sampler", "requests": N}"""
+    require_admin()
+    data = request.get_json(silent=True) or {}
+    try:
+        capture = profiling.start_capture(data.get('mode', 'sampler'), int(data.get('requests', 10)))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(capture)
+
+
+@app.route('/admin/profile/stop', methods=['POST'])
+def admin_profile_stop():
+    """Encerra a captura ativa com o que já foi coletado"""
+    require_admin()
+    profiling.cancel_capture()
+    return jsonify(profiling.get_status())
+
+
+@app.route('/admin/profile/files/<filename>', methods=['GET'])
+def admin_profile_file(filename):
+    """Download de uma captura (.pstats, .txt, .folded ou .tracemalloc)"""
+    require_admin()
+    path = profiling.capture_path(filename)
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=filename)
+
+
+@app.route('/admin/profile/memory/start', methods=['POST'])
+def admin_memory_start():
+    require_admin()
+    return jsonify(profiling.start_memory_tracing())
+
+
+@app.route('/admin/profile/memory/stop', methods=['POST'])
+def admin_memory_stop():
+    require_admin()
+    return jsonify(profiling.stop_memory_tracing())
+
+
+@app.route('/admin/profile/memory', methods=['GET'])
+def admin_memory_snapshot():
+    """Maiores pontos de alocação (?limit=25&group_by=lineno|filename|traceback)"""
+    require_admin()
+    try:
+        snapshot = profiling.memory_snapshot(
+            limit=request.args.get('limit', 25, type=int),
+            group_by=request.args.get('group_by', 'lineno'),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify(snapshot)
+
+
+@app.route('/tool/analyze_compositions_batch', methods=['POST'])
+def analyze_compositions_batch_route():
+    """
+    Analisa muitas comps numa requisição só.
+    
+    - JSON {"compositions": [[...], ...]}: resposta JSON completa
+    - JSON Lines (application/x-ndjson) ou CSV (text/csv) no corpo: resultados
+      em JSON Lines, em streaming, lendo o corpo aos poucos
+    """
+    from tools.agent_tools import (
+        analyze_compositions_batch,
+        iter_composition_batch_jsonl,
+        parse_compositions,
+    )
+    
+    if request.is_json:
+        data = request.json or {}
+        return jsonify(analyze_compositions_batch(data.get('compositions', [])))
+    
+    fmt = 'csv' if request.mimetype == 'text/csv' else 'jsonl'
+    lines = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    
+    def generate():
+        # Comps inválidas já saem como {"index", "error"}; aqui só sobra erro de
+        # leitura do corpo, e o 200 já foi enviado: o erro vira a última linha
+        try:
+            yield from iter_composition_batch_jsonl(parse_compositions(lines, fmt))
+        except Exception as e:
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @app.route('/tool/<tool_name>', methods=['POST'])
 def execute_tool(tool_name):
     """Executa uma ferramenta específica via API"""
@@ -99,4 +513,4 @@ def execute_tool(tool_name):
 if __name__ == '__main__':
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
-    app.run(debug=True, port=5000, host='0.0.0.0')
+    app.run(debug=True, port=5000, host='0.0.0.0', threaded=True)
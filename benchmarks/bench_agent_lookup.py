@@ -0,0 +1,53 @@
+"""
+Micro-benchmark da resolução de nomes de agentes.
+
+Compara o lookup antigo (normalização + dict, sem apelidos/typos) com o
+índice de apelidos + fuzzy de tools.agent_tools.
+
+Execute: python benchmarks/bench_agent_lookup.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.agent_tools import AGENT_ROLES, resolve_agent
+
+CASES = {
+    "exato": ["Jett", "Omen", "Sova", "Killjoy", "Sage"],
+    "apelido": ["kj", "kay o", "brim", "dl", "phx"],
+    "typo": ["killjoi", "pheonix", "brimston", "chambr", "deadlok"],
+    "inexistente": ["tenz", "xyzzy", "abcdef", "qwerty", "zzzz"],
+}
+
+
+def legacy_lookup(agent_name: str) -> str:
+    """Lookup de antes do índice (sem apelidos nem fuzzy)"""
+    return AGENT_ROLES.get(agent_name.lower().replace("/", "").replace("-", ""), "Unknown")
+
+
+def uncached_resolve(agent_name: str):
+    """resolve_agent sem o lru_cache, para medir o custo real do fuzzy"""
+    return resolve_agent.__wrapped__(agent_name)
+
+
+def bench(func, names, number):
+    total = timeit.timeit(lambda: [func(n) for n in names], number=number)
+    return total / (number * len(names)) * 1e6
+
+
+def main():
+    number = 2000
+    print(f"{'caso':<12} {'antigo (µs)':>12} {'índice (µs)':>12} {'sem cache (µs)':>15} {'acertos':>8}")
+    for case, names in CASES.items():
+        hits = sum(1 for n in names if resolve_agent(n))
+        print(
+            f"{case:<12} {bench(legacy_lookup, names, number):>12.3f} "
+            f"{bench(resolve_agent, names, number):>12.3f} "
+            f"{bench(uncached_resolve, names, number // 10):>15.3f} {hits:>5}/{len(names)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
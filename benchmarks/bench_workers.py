@@ -0,0 +1,89 @@
+"""
+Benchmark de escala do serve.py: vazão de 1 até N workers.
+
+Sobe o servidor com cada quantidade de workers, dispara requisições
+concorrentes numa rota local (sem Gemini/Tracker) e mede requisições/s.
+
+Execute: python benchmarks/bench_workers.py --max-workers 4 --requests 2000
+"""
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import argparse
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAYLOAD = json.dumps({"message": "analisa a comp Jett Omen Sova Killjoy Sage"}).encode("utf-8")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(base_url: str, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + "/", timeout=1).read()
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError("Servidor não subiu a tempo")
+
+
+def post_chat(base_url: str) -> None:
+    request = urllib.request.Request(
+        base_url + "/chat", data=PAYLOAD, headers={"Content-Type": "application/json"}
+    )
+    urllib.request.urlopen(request, timeout=30).read()
+
+
+def run(workers: int, total_requests: int, concurrency: int) -> float:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    store_path = os.path.join(tempfile.mkdtemp(), "store.sqlite3")
+    server = subprocess.Popen(
+        [sys.executable, "-W", "ignore", os.path.join(PROJECT_ROOT, "serve.py"),
+         "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port), "--store", store_path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(base_url)
+        # Aquecimento
+        for _ in range(workers * 4):
+            post_chat(base_url)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda _: post_chat(base_url), range(total_requests)))
+        return total_requests / (time.perf_counter() - start)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'escala':>8}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        throughput = run(workers, args.requests, args.concurrency)
+        baseline = baseline or throughput
+        print(f"{workers:>8} {throughput:>10.1f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
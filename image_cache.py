@@ -0,0 +1,307 @@
+"""
+Proxy de imagens do Tracker.gg (avatares, ícones de rank, imagens de agentes).
+
+As imagens ficam num cache em disco limitado por tamanho (LRU pelo horário do
+último acesso). Depois de IMAGE_FRESH_TTL a cópia local é revalidada no CDN
+com If-None-Match/If-Modified-Since; se o CDN falhar, a cópia antiga continua
+sendo servida. Miniaturas (?w=64) são geradas com Pillow, se instalado.
+"""
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import cloudscraper
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+IMAGE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "img")
+
+# Tamanho máximo do cache em disco (MB)
+IMAGE_CACHE_MAX_BYTES = int(float(os.getenv("VDH_IMG_CACHE_MB", "64")) * 1024 * 1024)
+
+# Por quanto tempo a cópia local é usada sem revalidar no CDN
+IMAGE_FRESH_TTL = 24 * 3600
+
+# Só esses domínios passam pelo proxy (não é um proxy aberto)
+ALLOWED_IMAGE_HOSTS = ("trackercdn.com", "tracker.gg", "valorant-api.com")
+
+# Larguras de miniatura aceitas (limita o número de variantes por imagem)
+THUMBNAIL_WIDTHS = (32, 64, 128, 256)
+
+# Tipos servidos pelo proxy. SVG fica de fora: pode levar script e seria
+# servido com a origem do site
+ALLOWED_IMAGE_TYPES = ("image/png", "image/jpeg", "image/webp", "image/gif", "image/avif")
+
+# Bytes contados por imagem além dos dados (arquivo .json de metadados)
+ENTRY_OVERHEAD = 256
+
+_evict_lock = threading.Lock()
+# Tamanho do cache por diretório, mantido a cada escrita; só é medido no disco
+# na primeira escrita e quando passa do limite (outros workers também escrevem)
+_cache_bytes = {}
+
+
+def is_allowed_image_url(url: str) -> bool:
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    return parts.scheme == "https" and any(host == h or host.endswith("." + h) for h in ALLOWED_IMAGE_HOSTS)
+
+
+def proxy_image_url(url: str) -> str:
+    """Troca a URL do CDN pela rota /img/ local (URLs vazias ou de outros domínios ficam como estão)."""
+    if not url or not is_allowed_image_url(url):
+        return url
+    token = base64.urlsafe_b64encode(url.encode("utf-8")).decode("ascii").rstrip("=")
+    return f"/img/{token}"
+
+
+def original_image_url(url: str) -> str:
+    """Desfaz proxy_image_url: /img/<token> volta a ser a URL do CDN (outras URLs ficam como estão)."""
+    if not url or not url.startswith("/img/"):
+        return url
+    return decode_image_token(url[len("/img/"):]) or url
+
+
+def rewrite_profile_images(profile: dict, rewrite) -> dict:
+    """Cópia do perfil com `rewrite` aplicado a avatar, rank_icon e imagens dos agentes."""
+    profile = dict(profile)
+    for key in ("avatar", "rank_icon"):
+        if key in profile:
+            profile[key] = rewrite(profile[key])
+    if profile.get("top_agents"):
+        profile["top_agents"] = [{**agent, "image": rewrite(agent.get("image"))} for agent in profile["top_agents"]]
+    return profile
+
+
+def decode_image_token(token: str):
+    """URL original de um token de /img/, ou None se for inválido/não permitido."""
+    try:
+        url = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return url if is_allowed_image_url(url) else None
+
+
+def _paths(url: str, width: int = None) -> tuple:
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    name = f"{digest}_w{width}" if width else digest
+    folder = os.path.join(IMAGE_CACHE_DIR, digest[:2])
+    return os.path.join(folder, name), os.path.join(folder, name + ".json")
+
+
+def _read_entry(url: str, width: int = None):
+    data_path, meta_path = _paths(url, width)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(data_path, "rb") as f:
+            data = f.read()
+    except (OSError, ValueError):
+        return None
+    # O horário de acesso do arquivo de dados é a ordem do LRU
+    try:
+        os.utime(data_path)
+    except OSError:
+        pass
+    return {**meta, "data": data}
+
+
+def _write_entry(url: str, width: int, data: bytes, meta: dict) -> None:
+    data_path, meta_path = _paths(url, width)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    try:
+        old_size = os.path.getsize(data_path) + ENTRY_OVERHEAD
+    except OSError:
+        old_size = 0
+    # Escreve em arquivo temporário e troca: outro worker nunca lê pela metade
+    for path, content in ((data_path, data), (meta_path, json.dumps(meta).encode("utf-8"))):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    with _evict_lock:
+        if IMAGE_CACHE_DIR not in _cache_bytes:
+            _cache_bytes[IMAGE_CACHE_DIR] = sum(size for _, size, _ in _scan_entries())
+        else:
+            _cache_bytes[IMAGE_CACHE_DIR] += len(data) + ENTRY_OVERHEAD - old_size
+        over_limit = _cache_bytes[IMAGE_CACHE_DIR] > IMAGE_CACHE_MAX_BYTES
+    if over_limit:
+        evict_images()
+
+
+def _scan_entries() -> list:
+    """(último acesso, tamanho, caminho) de cada imagem do cache em disco."""
+    entries = []
+    for root, _, files in os.walk(IMAGE_CACHE_DIR):
+        for name in files:
+            if name.endswith((".json", ".tmp")):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size + ENTRY_OVERHEAD, path))
+    return entries
+
+
+def evict_images(max_bytes: int = None) -> int:
+    """
+    Apaga as imagens usadas há mais tempo até o cache caber no limite.
+
+    Returns:
+        Quantidade de imagens apagadas
+    """
+    if max_bytes is None:
+        max_bytes = IMAGE_CACHE_MAX_BYTES
+    with _evict_lock:
+        entries = _scan_entries()
+        total = sum(size for _, size, _ in entries)
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            for victim in (path, path + ".json"):
+                try:
+                    os.remove(victim)
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+        _cache_bytes[IMAGE_CACHE_DIR] = total
+        return removed
+
+
+def fetch_image(url: str, etag: str = None, last_modified: str = None) -> dict:
+    """Baixa a imagem do CDN, condicional se houver validadores da cópia local."""
+    scraper = cloudscraper.create_scraper(
+        browser={
+            'browser': 'chrome',
+            'platform': 'windows',
+            'desktop': True
+        }
+    )
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    try:
+        response = scraper.get(url, headers=headers, timeout=10)
+
+        if response.status_code == 304:
+            return {"success": True, "not_modified": True}
+        elif response.status_code == 200:
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type not in ALLOWED_IMAGE_TYPES:
+                return {"success": False, "error": f"Tipo de imagem não suportado: {content_type}", "status_code": 502}
+            return {
+                "success": True,
+                "data": response.content,
+                "content_type": content_type,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+        else:
+            return {"success": False, "error": f"Erro HTTP {response.status_code}", "status_code": response.status_code}
+
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def get_original(url: str) -> dict:
+    """
+    Imagem original: do disco se fresca, revalidada no CDN se velha.
+
+    Returns:
+        Dict com 'data', 'content_type', 'digest' ou 'error'/'status_code'
+    """
+    entry = _read_entry(url)
+    if entry and time.time() - entry["fetched_at"] < IMAGE_FRESH_TTL:
+        return entry
+
+    validators = entry or {}
+    result = fetch_image(url, validators.get("upstream_etag"), validators.get("last_modified"))
+
+    if not result.get("success"):
+        # CDN fora do ar: a cópia antiga é melhor que nada
+        if entry:
+            return entry
+        return {"error": result.get("error", "Erro desconhecido"), "status_code": result.get("status_code") or 502}
+
+    if result.get("not_modified"):
+        meta = {k: v for k, v in entry.items() if k != "data"}
+        meta["fetched_at"] = time.time()
+        _write_entry(url, None, entry["data"], meta)
+        return {**meta, "data": entry["data"]}
+
+    meta = {
+        "content_type": result["content_type"],
+        "digest": hashlib.sha256(result["data"]).hexdigest()[:32],
+        "upstream_etag": result["etag"],
+        "last_modified": result["last_modified"],
+        "fetched_at": time.time(),
+    }
+    _write_entry(url, None, result["data"], meta)
+    return {**meta, "data": result["data"]}
+
+
+def make_thumbnail(data: bytes, width: int) -> tuple:
+    """Reduz a imagem para a largura pedida (PNG, mantém transparência)."""
+    with Image.open(BytesIO(data)) as image:
+        if image.width <= width:
+            return data, None
+        height = max(1, round(image.height * width / image.width))
+        thumbnail = image.convert("RGBA").resize((width, height), Image.LANCZOS)
+        output = BytesIO()
+        thumbnail.save(output, format="PNG", optimize=True)
+        return output.getvalue(), "image/png"
+
+
+def get_image(url: str, width: int = None) -> dict:
+    """
+    Imagem pronta para servir, original ou miniatura.
+
+    A miniatura é refeita quando a original muda (guarda o digest de origem).
+    Sem Pillow, ou com largura fora de THUMBNAIL_WIDTHS, serve a original.
+
+    Returns:
+        Dict com 'data', 'content_type', 'etag' ou 'error'/'status_code'
+    """
+    original = get_original(url)
+    if "error" in original:
+        return original
+
+    if not width or width not in THUMBNAIL_WIDTHS or Image is None:
+        return {"data": original["data"], "content_type": original["content_type"], "etag": original["digest"]}
+
+    thumbnail = _read_entry(url, width)
+    if not thumbnail or thumbnail.get("source_digest") != original["digest"]:
+        try:
+            data, content_type = make_thumbnail(original["data"], width)
+        except Exception:
+            # Formato que o Pillow não abre (ex: AVIF sem plugin): serve a original
+            return {"data": original["data"], "content_type": original["content_type"], "etag": original["digest"]}
+        thumbnail = {
+            "content_type": content_type or original["content_type"],
+            "digest": f"{original['digest'][:24]}-w{width}",
+            "source_digest": original["digest"],
+            "fetched_at": time.time(),
+        }
+        _write_entry(url, width, data, thumbnail)
+        thumbnail["data"] = data
+
+    return {"data": thumbnail["data"], "content_type": thumbnail["content_type"], "etag": thumbnail["digest"]}
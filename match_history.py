@@ -0,0 +1,270 @@
+"""
+Histórico de partidas do Tracker.gg, ingerido de forma incremental.
+
+Pagina o histórico do mais novo para o mais antigo com um generator, para na
+última partida já vista e atualiza agregados por agente e por mapa. A memória
+não depende do tamanho do histórico: só uma página e os agregados (um item por
+agente/mapa, mais uma janela fixa de forma recente) ficam em memória.
+"""
+import time
+from datetime import datetime, timezone
+
+import cloudscraper
+
+from store import get_store
+
+
+# Páginas lidas no máximo por ingestão (a primeira de um jogador é a mais longa)
+MAX_HISTORY_PAGES = 50
+
+# Partidas consideradas na "forma recente"
+RECENT_FORM_SIZE = 20
+
+STAT_KEYS = ("kills", "deaths", "assists", "damage", "rounds", "headshots")
+
+# Timeout de cada página no Tracker.gg (segundos)
+PAGE_TIMEOUT = 20
+
+
+def fetch_match_page(riot_id: str, cursor: str = None, timeout: float = PAGE_TIMEOUT) -> dict:
+    """Busca uma página do histórico competitivo no Tracker.gg."""
+    scraper = cloudscraper.create_scraper(
+        browser={
+            'browser': 'chrome',
+            'platform': 'windows',
+            'desktop': True
+        }
+    )
+
+    encoded_id = riot_id.replace("#", "%23")
+    url = f"https://api.tracker.gg/api/v2/valorant/standard/matches/riot/{encoded_id}?type=competitive"
+    if cursor:
+        url += f"&next={cursor}"
+
+    try:
+        response = scraper.get(url, timeout=timeout)
+
+        if response.status_code == 200:
+            data = response.json().get("data", {})
+            return {
+                "success": True,
+                "matches": data.get("matches", []),
+                "next": data.get("metadata", {}).get("next"),
+            }
+        elif response.status_code == 404:
+            return {"success": False, "error": "Perfil não encontrado. Verifique o Nick#Tag.", "status_code": 404}
+        else:
+            return {"success": False, "error": f"Erro HTTP {response.status_code}", "status_code": response.status_code}
+
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def parse_match(match: dict) -> dict:
+    """Extrai o resumo do jogador em uma partida (segmento 'overview')."""
+    attributes = match.get("attributes", {})
+    metadata = match.get("metadata", {})
+    segment = next((s for s in match.get("segments", []) if s.get("type") == "overview"), {})
+    segment_meta = segment.get("metadata", {})
+    stats = segment.get("stats", {})
+
+    def value(key):
+        return stats.get(key, {}).get("value") or 0
+
+    result = (segment_meta.get("result") or metadata.get("result") or "").lower()
+    return {
+        "id": attributes.get("id"),
+        "timestamp": metadata.get("timestamp"),
+        "map": metadata.get("mapName") or "Unknown",
+        "agent": segment_meta.get("agentName") or "Unknown",
+        "won": result in ("victory", "win", "won"),
+        "kills": value("kills"),
+        "deaths": value("deaths"),
+        "assists": value("assists"),
+        "damage": value("damage"),
+        "rounds": value("roundsPlayed"),
+        "headshots": value("headshots"),
+    }
+
+
+def parse_timestamp(value):
+    """Timestamp ISO do Tracker.gg como datetime em UTC (None se ausente/inválido)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class HistoryFetchError(Exception):
+    """Falha ao buscar uma página do histórico."""
+
+
+def iter_match_history(riot_id: str, stop_at_id: str = None, stop_at_time: str = None,
+                       max_pages: int = MAX_HISTORY_PAGES, budget: float = None):
+    """
+    Gera as partidas do jogador, da mais nova para a mais antiga, uma página por vez.
+
+    Partidas sem id são puladas (não dá para marcá-las como vistas).
+
+    Args:
+        riot_id: ID Riot no formato "Nick#Tag"
+        stop_at_id: Para (sem gerar) ao encontrar esta partida - a última já ingerida
+        stop_at_time: Para (sem gerar) na primeira partida com timestamp igual ou
+            anterior a este - cobre a última partida sumida do histórico
+        max_pages: Limite de páginas lidas
+        budget: Tempo máximo em segundos; ao acabar, para como no limite de páginas
+
+    Raises:
+        HistoryFetchError: se alguma página falhar antes do fim do prazo
+    """
+    stop_time = parse_timestamp(stop_at_time)
+    ends_at = time.monotonic() + budget if budget is not None else None
+    cursor = None
+    for _ in range(max_pages):
+        timeout = PAGE_TIMEOUT
+        if ends_at is not None:
+            remaining = ends_at - time.monotonic()
+            if remaining <= 0:
+                return
+            timeout = min(timeout, remaining)
+
+        page = fetch_match_page(riot_id, cursor, timeout=timeout)
+        if not page.get("success"):
+            # Página que estourou o prazo conta como fim da leitura, não como falha
+            if ends_at is not None and time.monotonic() >= ends_at:
+                return
+            raise HistoryFetchError(page.get("error", "Erro desconhecido"))
+
+        for match in page["matches"]:
+            parsed = parse_match(match)
+            if not parsed["id"]:
+                continue
+            if stop_at_id and parsed["id"] == stop_at_id:
+                return
+            match_time = parse_timestamp(parsed["timestamp"])
+            if stop_time and match_time and match_time <= stop_time:
+                return
+            yield parsed
+
+        cursor = page.get("next")
+        if not cursor or not page["matches"]:
+            return
+
+
+def empty_aggregates() -> dict:
+    return {"last_match_id": None, "last_match_at": None, "matches": 0, "agents": {}, "maps": {}, "recent": []}
+
+
+def add_match(bucket: dict, match: dict) -> None:
+    """Soma uma partida em um agregado (por agente ou por mapa)."""
+    bucket["matches"] = bucket.get("matches", 0) + 1
+    bucket["wins"] = bucket.get("wins", 0) + int(match["won"])
+    for key in STAT_KEYS:
+        bucket[key] = bucket.get(key, 0) + match[key]
+
+
+def ingest_match_history(riot_id: str, max_pages: int = MAX_HISTORY_PAGES, budget: float = None) -> dict:
+    """
+    Atualiza os agregados do jogador só com as partidas novas.
+
+    Os agregados só são gravados se a leitura terminar sem erro, para não
+    marcar partidas como vistas sem tê-las somado. Se o prazo (`budget`)
+    acabar na primeira ingestão, o que já foi lido é gravado, como no limite
+    de páginas; numa atualização, nada é gravado (senão as partidas entre o
+    que foi lido e a última ingerida nunca seriam somadas).
+
+    Returns:
+        Dict com 'aggregates', 'new_matches', 'partial' (prazo acabou) e, em caso de falha, 'error'
+    """
+    started_at = time.monotonic()
+    store = get_store()
+    key = riot_id.lower()
+
+    with store.session_lock(f"ingest:{key}"):
+        aggregates = store.get("match_aggregates", key) or empty_aggregates()
+        new_recent = []
+        new_matches = 0
+        newest = None
+
+        try:
+            matches = iter_match_history(
+                riot_id,
+                stop_at_id=aggregates["last_match_id"],
+                stop_at_time=aggregates["last_match_at"],
+                max_pages=max_pages,
+                budget=budget,
+            )
+            for match in matches:
+                if newest is None:
+                    newest = match
+                new_matches += 1
+                aggregates["matches"] += 1
+                add_match(aggregates["agents"].setdefault(match["agent"], {}), match)
+                add_match(aggregates["maps"].setdefault(match["map"], {}), match)
+                if len(new_recent) < RECENT_FORM_SIZE:
+                    new_recent.append({
+                        "won": match["won"],
+                        "agent": match["agent"],
+                        "map": match["map"],
+                        "kills": match["kills"],
+                        "deaths": match["deaths"],
+                    })
+        except HistoryFetchError as e:
+            stored = store.get("match_aggregates", key) or empty_aggregates()
+            return {"aggregates": stored, "new_matches": 0, "error": str(e)}
+
+        partial = budget is not None and time.monotonic() - started_at >= budget
+        if partial and aggregates["last_match_id"]:
+            stored = store.get("match_aggregates", key) or empty_aggregates()
+            return {"aggregates": stored, "new_matches": 0, "partial": True,
+                    "error": "Tempo esgotado ao ler as partidas novas. Tente de novo."}
+
+        if newest is not None:
+            aggregates["last_match_id"] = newest["id"]
+            aggregates["last_match_at"] = newest["timestamp"]
+            aggregates["recent"] = (new_recent + aggregates["recent"])[:RECENT_FORM_SIZE]
+        aggregates["updated_at"] = time.time()
+        store.set("match_aggregates", key, aggregates)
+
+        return {"aggregates": aggregates, "new_matches": new_matches, "partial": partial}
+
+
+def summarize_bucket(bucket: dict) -> dict:
+    """Converte somas em médias legíveis (win rate, K/D, ADR, HS% = headshots sobre kills)."""
+    matches = bucket.get("matches", 0)
+    deaths = bucket.get("deaths", 0)
+    rounds = bucket.get("rounds", 0)
+    kills = bucket.get("kills", 0)
+    return {
+        "matches": matches,
+        "winrate": round(100 * bucket.get("wins", 0) / matches, 1) if matches else None,
+        "kd": round(kills / deaths, 2) if deaths else None,
+        "adr": round(bucket.get("damage", 0) / rounds, 1) if rounds else None,
+        "kills_per_match": round(kills / matches, 1) if matches else None,
+        "hs_pct": round(100 * bucket.get("headshots", 0) / kills, 1) if kills else None,
+    }
+
+
+def summarize_aggregates(aggregates: dict) -> dict:
+    """Resumo por agente, por mapa e da forma recente, ordenado por partidas."""
+    def by_matches(buckets):
+        items = sorted(buckets.items(), key=lambda item: item[1].get("matches", 0), reverse=True)
+        return {name: summarize_bucket(bucket) for name, bucket in items}
+
+    recent = aggregates.get("recent", [])
+    wins = sum(1 for m in recent if m["won"])
+    return {
+        "matches": aggregates.get("matches", 0),
+        "last_match_at": aggregates.get("last_match_at"),
+        "agents": by_matches(aggregates.get("agents", {})),
+        "maps": by_matches(aggregates.get("maps", {})),
+        "recent_form": {
+            "matches": len(recent),
+            "wins": wins,
+            "losses": len(recent) - wins,
+            "results": "".join("V" if m["won"] else "D" for m in recent),
+        },
+    }
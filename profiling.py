@@ -0,0 +1,325 @@
+"""
+Profiling sob demanda do /chat (rotas de admin em app.py).
+
+- cprofile: perfila os próximos N pedidos com cProfile e junta tudo num .pstats
+  (abrir com `python -m pstats` ou snakeviz). Um pedido perfilado por vez: no
+  Python 3.12+ o cProfile vale para o interpretador inteiro.
+- sampler: amostra a pilha das threads dos próximos N pedidos (e dos pools de
+  threads do agent.py, que são compartilhados) a cada SAMPLE_INTERVAL e gera
+  pilhas colapsadas (.folded) para flamegraph.pl, speedscope ou inferno.
+- memória: tracemalloc com as linhas que mais alocaram e a diferença em
+  relação ao snapshot anterior (ex: históricos de sessão, buffers de imagem).
+
+Cada worker do serve.py tem sua própria captura.
+"""
+import os
+import io
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "profiles")
+
+PROFILE_MODES = ("cprofile", "sampler")
+
+# Pedidos por captura no máximo
+MAX_PROFILED_REQUESTS = 200
+
+# Intervalo entre amostras de pilha (segundos)
+SAMPLE_INTERVAL = 0.005
+
+# Pools de threads do agent.py (thread_name_prefix) amostrados junto com os pedidos:
+# o Gemini e o Tracker.gg rodam nelas enquanto a thread do pedido espera no event loop
+SAMPLED_POOL_PREFIXES = ("tracker", "gemini", "tools")
+
+# Frames guardados por alocação no tracemalloc
+TRACEMALLOC_FRAMES = 10
+
+_state_lock = threading.Lock()
+_cprofile_lock = threading.Lock()
+_capture = None
+_captures = []
+_sampled_threads = set()
+_sampler_thread = None
+_last_snapshot = None
+
+
+def start_capture(mode: str, requests: int) -> dict:
+    """
+    Começa a perfilar os próximos `requests` pedidos do /chat.
+
+    Raises:
+        ValueError: modo inválido, quantidade fora do limite ou captura já em andamento
+    """
+    global _capture
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Modo inválido: {mode}. Use: {', '.join(PROFILE_MODES)}")
+    if not 1 <= requests <= MAX_PROFILED_REQUESTS:
+        raise ValueError(f"Quantidade de pedidos deve ficar entre 1 e {MAX_PROFILED_REQUESTS}")
+
+    with _state_lock:
+        if _capture and not _capture["finished"]:
+            raise ValueError(f"Já existe uma captura em andamento: {_capture['id']}")
+        _capture = {
+            "id": f"{mode}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}",
+            "mode": mode,
+            "requested": requests,
+            "claimed": 0,
+            "completed": 0,
+            "skipped": 0,
+            "started_at": time.time(),
+            "finished": False,
+            "stats": None,
+            "stacks": Counter(),
+            "samples": 0,
+        }
+        return capture_summary(_capture)
+
+
+def cancel_capture() -> None:
+    """Encerra a captura atual com o que já foi coletado."""
+    with _state_lock:
+        if _capture and not _capture["finished"]:
+            _finish(_capture)
+
+
+def capture_summary(capture: dict) -> dict:
+    summary = {key: capture[key] for key in ("id", "mode", "requested", "completed", "skipped", "started_at", "finished")}
+    if capture["mode"] == "sampler":
+        summary["samples"] = capture["samples"]
+    if capture.get("files"):
+        summary["files"] = capture["files"]
+    return summary
+
+
+def get_status() -> dict:
+    with _state_lock:
+        return {
+            "active": capture_summary(_capture) if _capture and not _capture["finished"] else None,
+            "captures": [capture_summary(c) for c in _captures],
+            "memory_tracing": tracemalloc.is_tracing(),
+        }
+
+
+def _claim():
+    """Reserva uma vaga na captura atual para este pedido (None se não houver)."""
+    with _state_lock:
+        capture = _capture
+        if capture is None or capture["finished"] or capture["claimed"] >= capture["requested"]:
+            return None
+        capture["claimed"] += 1
+        return capture
+
+
+def _release(capture: dict, profiled: bool) -> None:
+    with _state_lock:
+        if profiled:
+            capture["completed"] += 1
+        else:
+            # Não deu para perfilar (outro pedido com cProfile): a vaga volta
+            capture["claimed"] -= 1
+            capture["skipped"] += 1
+        if not capture["finished"] and capture["completed"] >= capture["requested"]:
+            _finish(capture)
+
+
+@contextmanager
+def profile_request():
+    """Envolve o processamento de um /chat; só perfila se houver captura ativa."""
+    capture = _claim()
+    if capture is None:
+        yield
+        return
+
+    if capture["mode"] == "cprofile":
+        if not _cprofile_lock.acquire(blocking=False):
+            _release(capture, profiled=False)
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            _cprofile_lock.release()
+            with _state_lock:
+                # Captura cancelada no meio do pedido: o perfil deste é descartado
+                if not capture["finished"]:
+                    if capture["stats"] is None:
+                        capture["stats"] = pstats.Stats(profiler)
+                    else:
+                        capture["stats"].add(profiler)
+            _release(capture, profiled=True)
+        return
+
+    thread_id = threading.get_ident()
+    with _state_lock:
+        _sampled_threads.add(thread_id)
+        _ensure_sampler()
+    try:
+        yield
+    finally:
+        with _state_lock:
+            _sampled_threads.discard(thread_id)
+        _release(capture, profiled=True)
+
+
+def _ensure_sampler() -> None:
+    """Sobe a thread de amostragem (chamar com _state_lock)."""
+    global _sampler_thread
+    if _sampler_thread is None or not _sampler_thread.is_alive():
+        _sampler_thread = threading.Thread(target=_sample_loop, name="profiler-sampler", daemon=True)
+        _sampler_thread.start()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _sample_loop() -> None:
+    global _sampler_thread
+    while True:
+        with _state_lock:
+            capture = _capture
+            if not _sampled_threads or capture is None or capture["finished"]:
+                _sampler_thread = None
+                return
+            thread_ids = set(_sampled_threads)
+
+        pool_threads = {
+            thread.ident: thread.name.rsplit("_", 1)[0]
+            for thread in threading.enumerate()
+            if thread.name.startswith(SAMPLED_POOL_PREFIXES)
+        }
+        frames = sys._current_frames()
+        stacks = []
+        for thread_id, frame in frames.items():
+            if thread_id not in thread_ids and thread_id not in pool_threads:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.reverse()
+            if thread_id in pool_threads:
+                # Thread do pool parada esperando trabalho não entra
+                if not any(label.startswith("run (thread.py:") for label in labels):
+                    continue
+                labels.insert(0, f"[{pool_threads[thread_id]}]")
+            if labels:
+                stacks.append(";".join(labels))
+
+        with _state_lock:
+            if not capture["finished"]:
+                capture["stacks"].update(stacks)
+                capture["samples"] += len(stacks)
+        time.sleep(SAMPLE_INTERVAL)
+
+
+def _finish(capture: dict) -> None:
+    """Grava os arquivos da captura em PROFILE_DIR (chamar com _state_lock)."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    capture["finished"] = True
+    capture["finished_at"] = time.time()
+    files = []
+
+    if capture["mode"] == "cprofile" and capture["stats"] is not None:
+        capture["stats"].dump_stats(os.path.join(PROFILE_DIR, f"{capture['id']}.pstats"))
+        files.append(f"{capture['id']}.pstats")
+        # Resumo legível das funções mais caras
+        text = io.StringIO()
+        capture["stats"].stream = text
+        capture["stats"].sort_stats("cumulative").print_stats(40)
+        with open(os.path.join(PROFILE_DIR, f"{capture['id']}.txt"), "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+        files.append(f"{capture['id']}.txt")
+
+    if capture["mode"] == "sampler" and capture["stacks"]:
+        with open(os.path.join(PROFILE_DIR, f"{capture['id']}.folded"), "w", encoding="utf-8") as f:
+            for stack, count in capture["stacks"].most_common():
+                f.write(f"{stack} {count}\n")
+        files.append(f"{capture['id']}.folded")
+
+    capture["files"] = files
+    capture["stats"] = None
+    capture["stacks"] = Counter()
+    _captures.append(capture)
+    del _captures[:-20]
+
+
+def capture_path(filename: str):
+    """Caminho de um arquivo de captura para download (None se não existir ou for inválido)."""
+    if os.path.basename(filename) != filename or not filename.endswith((".pstats", ".txt", ".folded", ".tracemalloc")):
+        return None
+    path = os.path.join(PROFILE_DIR, filename)
+    return path if os.path.isfile(path) else None
+
+
+def start_memory_tracing() -> dict:
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        _last_snapshot = None
+    return {"memory_tracing": True, "frames": tracemalloc.get_traceback_limit()}
+
+
+def stop_memory_tracing() -> dict:
+    global _last_snapshot
+    tracemalloc.stop()
+    _last_snapshot = None
+    return {"memory_tracing": False}
+
+
+def memory_snapshot(limit: int = 25, group_by: str = "lineno") -> dict:
+    """
+    Snapshot do tracemalloc com os maiores pontos de alocação.
+
+    Também grava o snapshot em PROFILE_DIR (.tracemalloc, para tracemalloc.Snapshot.load)
+    e mostra o que cresceu desde o snapshot anterior.
+
+    Raises:
+        ValueError: tracemalloc desligado ou group_by inválido
+    """
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        raise ValueError("tracemalloc está desligado. Use POST /admin/profile/memory/start")
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise ValueError("group_by deve ser lineno, filename ou traceback")
+
+    # Sem as alocações do próprio tracemalloc/profiler
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+
+    def describe(stat) -> dict:
+        frames = stat.traceback.format() if group_by == "traceback" else [str(stat.traceback[0])]
+        item = {"size_kb": round(stat.size / 1024, 1), "count": stat.count, "where": frames}
+        if hasattr(stat, "size_diff"):
+            item["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+            item["count_diff"] = stat.count_diff
+        return item
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    filename = f"memory-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.tracemalloc"
+    snapshot.dump(os.path.join(PROFILE_DIR, filename))
+
+    result = {
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top": [describe(stat) for stat in snapshot.statistics(group_by)[:limit]],
+        "file": filename,
+    }
+    if _last_snapshot is not None:
+        result["growth"] = [describe(stat) for stat in snapshot.compare_to(_last_snapshot, group_by)[:limit]]
+    _last_snapshot = snapshot
+    return result
@@ -0,0 +1,78 @@
+"""
+Modo multi-worker do Valorant Draft Helper.
+
+Abre o socket uma vez e cria N processos (fork) servindo o mesmo app Flask.
+Perfis, respostas em cache, históricos de chat e locks de sessão ficam num
+SQLite compartilhado, então uma sessão pode cair em qualquer worker.
+
+Uso:
+    python serve.py --workers 4 --port 5000
+"""
+import os
+import sys
+import socket
+import signal
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from store import STORE_ENV
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "store.sqlite3")
+
+
+def run_worker(fd: int, host: str, port: int) -> None:
+    """Serve o app no socket herdado do processo pai."""
+    from werkzeug.serving import make_server
+    from app import app
+
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valorant Draft Helper com vários workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Número de processos")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--store", default=os.getenv(STORE_ENV, DEFAULT_STORE_PATH), help="Arquivo SQLite compartilhado")
+    args = parser.parse_args()
+
+    try:
+        context = multiprocessing.get_context("fork")
+    except ValueError:
+        print("❌ O modo multi-worker precisa de fork (Linux/macOS). Use: python app.py")
+        sys.exit(1)
+
+    # Os workers herdam a variável e abrem o mesmo SQLite
+    os.environ[STORE_ENV] = args.store
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(128)
+    listener.set_inheritable(True)
+
+    workers = []
+    for _ in range(args.workers):
+        process = context.Process(target=run_worker, args=(listener.fileno(), args.host, args.port), daemon=True)
+        process.start()
+        workers.append(process)
+
+    print(f"🎮 Valorant Draft Helper: {args.workers} workers em http://{args.host}:{args.port} (store: {args.store})")
+
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in workers:
+            process.terminate()
+        listener.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+Armazenamento compartilhado do Valorant Draft Helper.
+
+- MemoryStore: padrão, um processo só (python app.py / agent.py)
+- SQLiteStore: vários workers (python serve.py), todos apontando para o mesmo arquivo
+
+Guarda caches com TTL (perfis, respostas), históricos de chat serializados e
+locks de sessão que valem entre processos.
+"""
+import os
+import copy
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+
+# Variável de ambiente com o caminho do SQLite compartilhado (ativa o modo multi-worker)
+STORE_ENV = "VDH_STORE"
+
+# Por quanto tempo um lock de sessão vale se o worker morrer no meio do turno
+SESSION_LOCK_LEASE = 120
+
+# Sessões sem turno há mais que isso perdem histórico e lock (segundos)
+SESSION_IDLE_TTL = int(float(os.getenv("VDH_SESSION_IDLE_HOURS", "24")) * 3600)
+
+# O SQLiteStore faz a limpeza ao abrir e a cada tantas escritas do processo
+PURGE_EVERY_WRITES = 500
+
+
+class MemoryStore:
+    """Store em memória, para um único processo."""
+
+    shared = False
+
+    def __init__(self):
+        self._data = {}
+        # session_id -> (histórico, último uso)
+        self._histories = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str):
+        with self._lock:
+            item = self._data.get((namespace, key))
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at and expires_at < time.time():
+                del self._data[(namespace, key)]
+                return None
+            # Cópia: quem lê pode alterar o valor sem mexer no cache
+            return copy.deepcopy(value)
+
+    def set(self, namespace: str, key: str, value, ttl: float = 0) -> None:
+        expires_at = time.time() + ttl if ttl else 0
+        with self._lock:
+            self._data[(namespace, key)] = (value, expires_at)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._data.pop((namespace, key), None)
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            for item_key in [k for k in self._data if k[0] == namespace]:
+                del self._data[item_key]
+
+    def load_history(self, session_id: str) -> list:
+        with self._lock:
+            history, _ = self._histories.get(session_id, ([], 0))
+            return list(history)
+
+    def save_history(self, session_id: str, history: list) -> None:
+        with self._lock:
+            self._histories[session_id] = (list(history), time.time())
+
+    def delete_history(self, session_id: str) -> None:
+        with self._lock:
+            self._histories.pop(session_id, None)
+
+    def session_lock(self, session_id: str):
+        with self._lock:
+            lock, _ = self._locks.get(session_id, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[session_id] = (lock, time.time())
+            return lock
+
+    def purge(self, max_idle: float = SESSION_IDLE_TTL) -> int:
+        """
+        Apaga históricos e locks de sessões paradas há mais de `max_idle` segundos
+        e os itens com TTL vencido.
+
+        Returns:
+            Quantidade de históricos apagados
+        """
+        now = time.time()
+        cutoff = now - max_idle
+        with self._lock:
+            # Itens com TTL vencido que ninguém leu de novo (ex: session_context)
+            for item_key, (_, expires_at) in list(self._data.items()):
+                if expires_at and expires_at < now:
+                    del self._data[item_key]
+            stale = [session_id for session_id, (_, used_at) in self._histories.items() if used_at < cutoff]
+            for session_id in stale:
+                del self._histories[session_id]
+            for session_id, (lock, used_at) in list(self._locks.items()):
+                if used_at < cutoff and not lock.locked():
+                    del self._locks[session_id]
+            return len(stale)
+
+
+class SQLiteLock:
+    """Lock com lease guardado no SQLite, válido entre processos."""
+
+    def __init__(self, store: "SQLiteStore", name: str, lease: float = SESSION_LOCK_LEASE, poll: float = 0.05):
+        self.store = store
+        self.name = name
+        self.lease = lease
+        self.poll = poll
+        self.owner = None
+
+    def acquire(self) -> bool:
+        owner = uuid.uuid4().hex
+        while True:
+            now = time.time()
+            conn = self.store._conn()
+            with conn:
+                conn.execute("DELETE FROM locks WHERE name = ? AND expires_at < ?", (self.name, now))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO locks (name, owner, expires_at) VALUES (?, ?, ?)",
+                    (self.name, owner, now + self.lease),
+                )
+            if cursor.rowcount == 1:
+                self.owner = owner
+                return True
+            time.sleep(self.poll)
+
+    def release(self) -> None:
+        conn = self.store._conn()
+        with conn:
+            conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (self.name, self.owner))
+        self.owner = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SQLiteStore:
+    """Store em SQLite (WAL), compartilhado por todos os workers da máquina."""
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "namespace TEXT, key TEXT, value TEXT, expires_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS histories ("
+                "session_id TEXT PRIMARY KEY, history TEXT, updated_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                "name TEXT PRIMARY KEY, owner TEXT, expires_at REAL)"
+            )
+        # Cada worker abre o store ao subir: limpa o que venceu enquanto estava parado
+        self.purge()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Uma conexão por thread e por processo (conexões não sobrevivem ao fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count_write(self) -> None:
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes >= PURGE_EVERY_WRITES
+            if due:
+                self._writes = 0
+        if due:
+            self.purge()
+
+    def get(self, namespace: str, key: str):
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at and expires_at < time.time():
+            self.delete(namespace, key)
+            return None
+        return json.loads(value)
+
+    def set(self, namespace: str, key: str, value, ttl: float = 0) -> None:
+        expires_at = time.time() + ttl if ttl else 0
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, ensure_ascii=False), expires_at),
+            )
+        self._count_write()
+
+    def delete(self, namespace: str, key: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+
+    def load_history(self, session_id: str) -> list:
+        row = self._conn().execute(
+            "SELECT history FROM histories WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def save_history(self, session_id: str, history: list) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO histories (session_id, history, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(history), time.time()),
+            )
+        self._count_write()
+
+    def delete_history(self, session_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM histories WHERE session_id = ?", (session_id,))
+
+    def session_lock(self, session_id: str) -> SQLiteLock:
+        return SQLiteLock(self, f"session:{session_id}")
+
+    def purge(self, max_idle: float = SESSION_IDLE_TTL) -> int:
+        """
+        Apaga itens com TTL vencido, históricos parados há mais de `max_idle`
+        segundos e locks vencidos (de workers que morreram no meio do turno).
+
+        Returns:
+            Quantidade de históricos apagados
+        """
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM kv WHERE expires_at > 0 AND expires_at < ?", (now,))
+            cursor = conn.execute("DELETE FROM histories WHERE updated_at < ?", (now - max_idle,))
+            conn.execute("DELETE FROM locks WHERE expires_at < ?", (now,))
+        return cursor.rowcount
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Retorna o store do processo: SQLite se VDH_STORE estiver definido, memória caso contrário."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = os.getenv(STORE_ENV)
+            _store = SQLiteStore(path) if path else MemoryStore()
+        return _store
+
+
+def set_store(store) -> None:
+    """Troca o store do processo (usado pelo serve.py e pelos testes)."""
+    global _store
+    with _store_lock:
+        _store = store
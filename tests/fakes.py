@@ -0,0 +1,34 @@
+"""
+Dublês compartilhados pelos testes (Tracker.gg simulado, sem rede)
+"""
+import time
+
+import agent
+from store import get_store
+
+AVATAR_URL = "https://avatars.trackercdn.com/api/avatar/2/abc.png"
+AGENT_IMAGE_URL = "https://titles.trackercdn.com/valorant-api/agents/jett/displayicon.png"
+
+
+def fake_api_response(riot_id: str) -> dict:
+    """Resposta mínima no formato da API do Tracker.gg"""
+    return {
+        "success": True,
+        "data": {"data": {
+            "platformInfo": {"platformUserHandle": riot_id, "avatarUrl": AVATAR_URL},
+            "metadata": {"activeShard": "br"},
+            "segments": [
+                {"type": "season", "stats": {"kDRatio": {"displayValue": "1.10"}}, "metadata": {}},
+                {"type": "agent", "metadata": {"name": "Jett", "imageUrl": AGENT_IMAGE_URL}, "stats": {"kDRatio": {"displayValue": "1.30"}}},
+            ],
+        }},
+    }
+
+
+def with_fake_tracker(delays: dict):
+    """Substitui fetch_tracker_api por uma versão com atraso por jogador"""
+    def fake_fetch(riot_id):
+        time.sleep(delays.get(riot_id, 0))
+        return fake_api_response(riot_id)
+    agent.fetch_tracker_api = fake_fetch
+    get_store().clear("profiles")
@@ -0,0 +1,108 @@
+"""
+Testes do índice de apelidos e do fuzzy de nomes de agentes
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.agent_tools import (
+    resolve_agent,
+    get_agent_role,
+    get_agent_info,
+    analyze_team_composition,
+)
+from tools.intent_router import classify_intent, ROUTE_COMPOSITION
+
+
+def test_resolve_aliases_typos_accents():
+    print("\n" + "=" * 50)
+    print("TEST: resolve_agent() com apelidos, typos e acentos")
+    cases = {
+        "killjoi": "Killjoy",
+        "kj": "Killjoy",
+        "kay o": "KAY/O",
+        "KAY-O": "KAY/O",
+        "Ságe": "Sage",
+        "pheonix": "Phoenix",
+        "  omen ": "Omen",
+    }
+
+    for typed, expected in cases.items():
+        assert resolve_agent(typed) == expected, f"'{typed}' deveria virar {expected}: {resolve_agent(typed)}"
+    assert resolve_agent("tenz") is None, "Nome longe de qualquer agente não deveria casar"
+    assert resolve_agent("k") is None, "Uma letra não deveria casar por fuzzy"
+    common_words = (
+        "open", "nova", "safe", "rage", "isso",
+        "agora", "outra", "fazer", "saber", "salve", "jeito", "visto", "viver", "virar",
+    )
+    for word in common_words:
+        assert resolve_agent(word) is None, f"'{word}' é palavra comum, não agente: {resolve_agent(word)}"
+
+    print(f"✅ {len(cases)} nomes resolvidos")
+    return True
+
+
+def test_tools_use_index():
+    print("\n" + "=" * 50)
+    print("TEST: ferramentas usam o índice")
+    result = analyze_team_composition(["jet", "kj", "kay o", "omen", "raze"])
+    names = [a["name"] for a in result["agents"]]
+
+    assert names == ["Jett", "Killjoy", "KAY/O", "Omen", "Raze"], f"Nomes oficiais esperados: {names}"
+    assert result["role_count"]["Sentinel"] == 1, "kj deveria contar como Sentinel"
+    assert get_agent_role("killjoi") == "Sentinel", "get_agent_role deveria aceitar typo"
+
+    assert get_agent_info("agora")["status"] == "error", "Palavra comum não deveria virar agente"
+    info = get_agent_info("qwerty")
+    assert info["status"] == "error", "Nome inexistente deveria dar erro"
+    assert 0 < len(info["suggestions"]) <= 3, "Deveria sugerir poucos nomes, não a lista toda"
+
+    print(f"✅ {names}")
+    return True
+
+
+def test_router_knows_aliases():
+    print("\n" + "=" * 50)
+    print("TEST: roteador reconhece apelidos")
+    intent = classify_intent("analisa a comp jett kj kay o omen sova")
+
+    assert intent["route"] == ROUTE_COMPOSITION, f"Deveria ser composição: {intent}"
+    assert intent["agents"] == ["Jett", "Killjoy", "KAY/O", "Omen", "Sova"], f"Agentes errados: {intent['agents']}"
+
+    print(f"✅ {intent['agents']}")
+    return True
+
+
+def main():
+    print("🧪 TESTES DO ÍNDICE DE AGENTES")
+    print("=" * 50)
+
+    tests = [
+        test_resolve_aliases_typos_accents,
+        test_tools_use_index,
+        test_router_knows_aliases,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
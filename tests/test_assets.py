@@ -0,0 +1,117 @@
+"""
+Testes dos assets versionados e da compressão das respostas
+"""
+import sys
+import os
+import re
+import gzip
+import hashlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import app
+
+
+def test_index_uses_fingerprinted_assets():
+    print("\n" + "=" * 50)
+    print("TEST: index.html aponta para assets versionados")
+    html = app.test_client().get('/').get_data(as_text=True)
+    urls = re.findall(r'/assets/[\w.]+', html)
+
+    assert any(re.fullmatch(r'/assets/style\.[0-9a-f]{12}\.css', u) for u in urls), f"CSS sem hash: {urls}"
+    assert any(re.fullmatch(r'/assets/script\.[0-9a-f]{12}\.js', u) for u in urls), f"JS sem hash: {urls}"
+
+    print(f"✅ {urls}")
+    return True
+
+
+def test_asset_gzip_and_immutable():
+    print("\n" + "=" * 50)
+    print("TEST: asset pré-comprimido com cache imutável")
+    client = app.test_client()
+    html = client.get('/').get_data(as_text=True)
+    url = re.search(r'/assets/style\.[0-9a-f]{12}\.css', html).group(0)
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    plain = client.get(url)
+    stale = client.get('/assets/style.000000000000.css')
+
+    assert response.headers["Content-Encoding"] == "gzip", "Deveria vir com gzip"
+    assert "immutable" in response.headers["Cache-Control"], "Deveria ser imutável"
+    assert gzip.decompress(response.data) == plain.data, "Conteúdo comprimido deveria bater com o original"
+    assert len(response.data) < len(plain.data), "gzip deveria ser menor"
+    assert stale.status_code == 404, "Hash desconhecido deveria dar 404"
+
+    print(f"✅ {len(plain.data)} -> {len(response.data)} bytes")
+    return True
+
+
+def test_asset_served_without_render():
+    print("\n" + "=" * 50)
+    print("TEST: asset servido sem renderizar a página antes (outro worker)")
+    with open(os.path.join(app.static_folder, 'style.css'), 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    app_module._assets.clear()
+    client = app.test_client()
+    url = f'/assets/style.{digest[:12]}.css'
+
+    plain = client.get(url)
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    traversal = client.get('/assets/..%2Fapp.000000000000.py')
+
+    assert plain.status_code == 200, f"Worker novo deveria servir o asset: {plain.status_code}"
+    assert plain.headers["ETag"] != compressed.headers["ETag"], "Cada codificação deveria ter seu ETag"
+    assert traversal.status_code == 404, "Fora de static/ deveria dar 404"
+
+    print(f"✅ {plain.headers['ETag']} / {compressed.headers['ETag']}")
+    return True
+
+
+def test_tool_json_gzip():
+    print("\n" + "=" * 50)
+    print("TEST: respostas JSON grandes vêm com gzip")
+    client = app.test_client()
+    payload = {"agents": ["Jett", "Reyna", "Raze"]}
+    response = client.post('/tool/analyze_team_composition', json=payload, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers.get("Content-Encoding") == "gzip", f"Deveria vir com gzip: {response.headers}"
+    assert b'"status"' in gzip.decompress(response.data), "JSON deveria descomprimir"
+
+    print(f"✅ {len(response.data)} bytes comprimidos")
+    return True
+
+
+def main():
+    print("🧪 TESTES DOS ASSETS")
+    print("=" * 50)
+
+    tests = [
+        test_index_uses_fingerprinted_assets,
+        test_asset_gzip_and_immutable,
+        test_asset_served_without_render,
+        test_tool_json_gzip,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,118 @@
+"""
+Testes da análise de composições em lote
+"""
+import sys
+import os
+import json
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.agent_tools import (
+    ALL_AGENTS,
+    analyze_compositions_batch,
+    analyze_team_composition,
+    iter_composition_batch_jsonl,
+)
+from app import app
+
+
+def random_comps(n: int) -> list:
+    rng = random.Random(42)
+    names = ALL_AGENTS + ["kj", "killjoi", "agente_fake"]
+    return [[rng.choice(names) for _ in range(rng.randint(1, 5))] for _ in range(n)]
+
+
+def test_batch_matches_single():
+    print("\n" + "=" * 50)
+    print("TEST: lote dá o mesmo resultado que analyze_team_composition")
+    comps = random_comps(3000)
+    batch = analyze_compositions_batch(comps)
+
+    assert batch["total"] == len(comps), "Deveria analisar todas as comps"
+    for comp, result in zip(comps, batch["results"]):
+        single = analyze_team_composition(comp)
+        for key in ("role_count", "issues", "suggestions", "composition_score", "verdict"):
+            assert result[key] == single[key], f"{key} diferente para {comp}: {result[key]} != {single[key]}"
+        assert result["agents"] == [a["name"] for a in single["agents"]], f"Agentes diferentes para {comp}"
+
+    print(f"✅ {len(comps)} comps iguais à análise individual")
+    return True
+
+
+def test_jsonl_matches_dicts():
+    print("\n" + "=" * 50)
+    print("TEST: saída JSON Lines igual à saída em dicts")
+    comps = random_comps(500) + [{"id": "scrim-1", "agents": ["Jett", "Omen", "Sova", "Killjoy", "Sage"]}]
+    lines = list(iter_composition_batch_jsonl(comps, chunk_size=64))
+    results = analyze_compositions_batch(comps)["results"]
+
+    assert [json.loads(line) for line in lines] == results, "JSON Lines deveria bater com os dicts"
+    assert results[-1]["id"] == "scrim-1", "Deveria manter o id da comp"
+
+    print(f"✅ {len(lines)} linhas")
+    return True
+
+
+def test_batch_route_jsonl_and_csv():
+    print("\n" + "=" * 50)
+    print("TEST: /tool/analyze_compositions_batch com JSON Lines e CSV")
+    client = app.test_client()
+
+    jsonl_body = '["Jett","Omen","Sova","Killjoy","Sage"]\n{"id": "m2", "agents": ["Jett","Reyna","Raze"]}\n'
+    response = client.post('/tool/analyze_compositions_batch', data=jsonl_body, content_type='application/x-ndjson')
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r["composition_score"] for r in rows] == [10, 2], f"Notas erradas: {rows}"
+    assert rows[1]["id"] == "m2", "Deveria manter o id"
+
+    csv_body = "id,a1,a2,a3,a4,a5\nm1,Jett,Omen,Sova,Killjoy,Sage\nm2,Jett,Reyna,Raze,,\n"
+    response = client.post('/tool/analyze_compositions_batch', data=csv_body, content_type='text/csv')
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(r["id"], r["composition_score"]) for r in rows] == [("m1", 10), ("m2", 2)], f"CSV errado: {rows}"
+
+    bad_body = '["Jett"]\n{quebrado\n5\nnull\n"Jett Omen"\n{"id": "x", "agents": "Jett"}\n["Jett","Omen","Sova","Killjoy","Sage","Raze"]\n["Omen"]\n'
+    response = client.post('/tool/analyze_compositions_batch', data=bad_body, content_type='application/x-ndjson')
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r["index"] for r in rows] == list(range(8)), f"Deveria ter uma linha por comp, na ordem: {rows}"
+    assert "Linha 2" in rows[1]["error"], f"Deveria apontar a linha inválida: {rows[1]}"
+    assert all("error" in r for r in rows[1:7]), f"Linhas 2 a 7 são inválidas: {rows}"
+    assert rows[5]["id"] == "x", "Erro deveria manter o id"
+    assert "6 agentes" in rows[6]["error"], f"Mais de 5 agentes não pode ser cortado: {rows[6]}"
+    assert rows[7]["agents"] == ["Omen"], "O lote deveria continuar depois das linhas inválidas"
+
+    print("✅ JSON Lines, CSV e erros por linha")
+    return True
+
+
+def main():
+    print("🧪 TESTES DA ANÁLISE EM LOTE")
+    print("=" * 50)
+
+    tests = [
+        test_batch_matches_single,
+        test_jsonl_matches_dicts,
+        test_batch_route_jsonl_and_csv,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
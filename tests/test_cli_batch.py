@@ -0,0 +1,128 @@
+"""
+Testes do modo batch do CLI (Tracker.gg simulado, sem rede)
+"""
+import sys
+import os
+import io
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent
+from tests.fakes import with_fake_tracker, AVATAR_URL, AGENT_IMAGE_URL
+
+
+def test_parse_batch_items():
+    print("\n" + "=" * 50)
+    print("TEST: parse_batch_items() aceita texto e JSON")
+    items = agent.parse_batch_items([
+        "A#1\n",
+        "# comentário\n",
+        "\n",
+        '{"id": "duo", "message": "A#1 e B#2 jogam bem juntos?"}\n',
+    ])
+
+    assert [i["id"] for i in items] == ["0", "duo"], f"Ids inesperados: {items}"
+    assert items[0]["message"] == "A#1", "Linhas de texto viram a mensagem"
+
+    try:
+        agent.parse_batch_items(['{"id": "x"}'])
+        assert False, "JSON sem 'message' deveria falhar"
+    except ValueError as e:
+        assert "Linha 1" in str(e), f"Erro deveria citar a linha: {e}"
+
+    print(f"✅ {len(items)} itens")
+    return True
+
+
+def test_run_batch_concurrent():
+    print("\n" + "=" * 50)
+    print("TEST: run_batch() processa em paralelo e grava JSONL")
+    riot_ids = [f"P{i}#BR1" for i in range(6)]
+    original = agent.fetch_tracker_api
+    output = io.StringIO()
+    try:
+        with_fake_tracker({riot_id: 0.3 for riot_id in riot_ids})
+        items = agent.parse_batch_items(riot_ids + ["quais são os mapas?"])
+        start = time.perf_counter()
+        summary = asyncio.run(agent.run_batch(items, output, workers=3))
+        elapsed = time.perf_counter() - start
+    finally:
+        agent.fetch_tracker_api = original
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert sorted(r["index"] for r in results) == list(range(7)), "Deveria ter uma linha por item"
+    assert summary["ok"] == 7 and summary["errors"] == 0, f"Todos deveriam dar certo: {summary}"
+    assert elapsed < 1.2, f"3 workers deveriam levar ~2 rodadas de 0.3s, levou {elapsed:.2f}s"
+    assert all("elapsed_ms" in r and "queue_ms" in r for r in results), "Cada item deveria ter tempos"
+    profile_result = next(r for r in results if r["message"] == "P0#BR1")
+    profile = profile_result["profiles"]["P0#BR1"]
+    assert profile["found"], "Itens com Riot ID trazem o perfil estruturado"
+    assert profile["avatar"] == AVATAR_URL, f"Relatório deveria ter a URL do CDN, não /img/: {profile['avatar']}"
+    assert profile["top_agents"][0]["image"] == AGENT_IMAGE_URL, "Imagem do agente deveria ser a URL do CDN"
+    assert max(r["queue_ms"] for r in results) > 200, "Itens além do limite de workers deveriam esperar na fila"
+
+    print(f"✅ 7 itens em {elapsed:.2f}s (p50 {summary['p50_ms']}ms)")
+    return True
+
+
+def test_cli_argument_errors():
+    print("\n" + "=" * 50)
+    print("TEST: CLI recusa arquivo inexistente e --workers inválido")
+    stderr = io.StringIO()
+    args = argparse.Namespace(batch="/nao/existe.txt", output="-", workers=2, deadline=5)
+    with contextlib.redirect_stderr(stderr):
+        code = agent.run_batch_cli(args)
+        rejected = []
+        for workers in ("0", "-3", "dois"):
+            try:
+                agent.build_arg_parser().parse_args(["--batch", "x.txt", "--workers", workers])
+            except SystemExit:
+                rejected.append(workers)
+
+    assert code == 1, f"Arquivo inexistente deveria sair com 1: {code}"
+    assert "/nao/existe.txt" in stderr.getvalue(), "Deveria dizer qual arquivo falhou"
+    assert rejected == ["0", "-3", "dois"], f"--workers < 1 deveria ser recusado: {rejected}"
+    assert agent.build_arg_parser().parse_args(["--workers", "3"]).workers == 3, "--workers 3 é válido"
+
+    print("✅ Código 1 e argumentos recusados")
+    return True
+
+
+def main():
+    print("🧪 TESTES DO BATCH DO CLI")
+    print("=" * 50)
+
+    tests = [
+        test_parse_batch_items,
+        test_run_batch_concurrent,
+        test_cli_argument_errors,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,150 @@
+"""
+Testes do prazo por pedido e do cancelamento por desconexão (Gemini e Tracker.gg simulados)
+"""
+import sys
+import os
+import json
+import time
+import socket
+import asyncio
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent
+import app as app_module
+from store import get_store
+from tests.fakes import with_fake_tracker
+
+
+class SlowChat:
+    """Chat que demora para responder"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.history = []
+
+    def send_message(self, content, tools=None):
+        time.sleep(self.delay)
+        raise RuntimeError("não deveria chegar aqui")
+
+
+class SlowModel:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def start_chat(self, history=None):
+        return SlowChat(self.delay)
+
+
+def use_slow_model(delay):
+    original = agent.model
+    agent.model = SlowModel(delay)
+    agent.chat_sessions.clear()
+    return original
+
+
+def test_partial_answer_on_deadline():
+    print("\n" + "=" * 50)
+    print("TEST: prazo estourado devolve os perfis sem comentário")
+    original_fetch = agent.fetch_tracker_api
+    original_model = use_slow_model(3.0)
+    try:
+        with_fake_tracker({})
+        start = time.perf_counter()
+        response = asyncio.run(agent.process_message(
+            "s-deadline", "o que A#1 deveria jogar na Ascent?", deadline=agent.Deadline(0.5)
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        agent.fetch_tracker_api = original_fetch
+        agent.model = original_model
+
+    assert elapsed < 1.0, f"Deveria responder no prazo, levou {elapsed:.2f}s"
+    assert "interrompida" in response, f"Deveria avisar que é parcial: {response}"
+    assert "A#1" in response, "Deveria trazer o perfil já buscado"
+
+    print(f"✅ Resposta parcial em {elapsed:.2f}s")
+    return True
+
+
+def test_cancelled_when_client_leaves():
+    print("\n" + "=" * 50)
+    print("TEST: desconexão do cliente cancela o turno")
+    from werkzeug.serving import make_server
+
+    original_model = use_slow_model(3.0)
+    original_process = app_module.process_message
+    outcome = {}
+
+    async def observed_process(**kwargs):
+        start = time.perf_counter()
+        try:
+            return await original_process(**kwargs)
+        except BaseException as e:
+            outcome["error"] = type(e).__name__
+            raise
+        finally:
+            outcome["elapsed"] = time.perf_counter() - start
+
+    app_module.process_message = observed_process
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        body = json.dumps({"message": "qual o meta atual?"}).encode("utf-8")
+        client = socket.create_connection(("127.0.0.1", server.server_port))
+        client.sendall(
+            b"POST /chat HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+        )
+        time.sleep(0.3)
+        client.close()
+
+        deadline = time.time() + 5
+        while "elapsed" not in outcome and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        server.shutdown()
+        app_module.process_message = original_process
+        agent.model = original_model
+        get_store().clear("answers")
+
+    assert outcome.get("error") == "RequestCancelled", f"Deveria cancelar: {outcome}"
+    assert outcome["elapsed"] < 1.5, f"Deveria parar logo após a desconexão: {outcome['elapsed']:.2f}s"
+
+    print(f"✅ Cancelado {outcome['elapsed']:.2f}s após o início")
+    return True
+
+
+def main():
+    print("🧪 TESTES DE PRAZO E CANCELAMENTO")
+    print("=" * 50)
+
+    tests = [
+        test_partial_answer_on_deadline,
+        test_cancelled_when_client_leaves,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
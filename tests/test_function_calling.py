@@ -0,0 +1,252 @@
+"""
+Testes do loop local de function calling (Gemini simulado, sem rede)
+"""
+import sys
+import os
+import time
+import asyncio
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.generativeai import protos
+from google.api_core import exceptions as google_exceptions
+
+import agent
+
+
+class FakeResponse:
+    """Imita GenerateContentResponse com as partes informadas"""
+
+    def __init__(self, parts):
+        self.candidates = [protos.Candidate(content=protos.Content(role="model", parts=parts))]
+
+    @property
+    def text(self):
+        # Como no SDK: resposta com function_call não tem texto
+        if any(p.function_call.name for p in self.candidates[0].content.parts):
+            raise ValueError("A resposta contém function_call, não texto")
+        return "".join(p.text for p in self.candidates[0].content.parts)
+
+
+class FakeChat:
+    """Pede duas funções na primeira rodada e responde texto na segunda"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, content, tools=None):
+        self.sent.append(content)
+        if len(self.sent) == 1:
+            return FakeResponse([
+                protos.Part(function_call=protos.FunctionCall(
+                    name="analyze_team_composition",
+                    args={"agents": ["Jett", "Omen", "Sova", "Killjoy", "Sage"]},
+                )),
+                protos.Part(function_call=protos.FunctionCall(name="get_agent_info", args={"agent_name": "Viper"})),
+            ])
+        return FakeResponse([protos.Part(text="Composição equilibrada.")])
+
+
+def test_send_with_local_tools():
+    print("\n" + "=" * 50)
+    print("TEST: send_with_local_tools() executa as funções localmente")
+    chat = FakeChat()
+    text, tool_calls, usage = asyncio.run(agent.send_with_local_tools(chat, ["analisa minha comp"]))
+
+    assert text == "Composição equilibrada.", f"Texto final inesperado: {text}"
+    assert tool_calls == 2, f"Deveria executar 2 chamadas: {tool_calls}"
+
+    responses = chat.sent[1]
+    names = [p.function_response.name for p in responses]
+    assert names == ["analyze_team_composition", "get_agent_info"], f"Respostas fora de ordem: {names}"
+
+    result = type(responses[0].function_response).to_dict(responses[0].function_response)["response"]["result"]
+    assert result["composition_score"] == 10, f"Resultado da função não chegou ao modelo: {result}"
+
+    print(f"✅ {tool_calls} chamadas, resposta: {text}")
+    return True
+
+
+class LoopingChat:
+    """Pede função em toda rodada com ferramentas; só responde texto com tools=[]"""
+
+    def __init__(self):
+        self.history = []
+        self.tools_sent = []
+
+    def send_message(self, content, tools=None):
+        self.tools_sent.append(tools)
+        parts = content if isinstance(content, list) else [content]
+        user_parts = [p if isinstance(p, protos.Part) else protos.Part(text=p) for p in parts]
+        if tools == []:
+            model_parts = [protos.Part(text="Resposta sem ferramentas.")]
+        else:
+            model_parts = [protos.Part(function_call=protos.FunctionCall(name="get_agent_info", args={"agent_name": "Jett"}))]
+        self.history = self.history + [
+            protos.Content(role="user", parts=user_parts),
+            protos.Content(role="model", parts=model_parts),
+        ]
+        return FakeResponse(model_parts)
+
+
+def test_fallback_restores_history():
+    print("\n" + "=" * 50)
+    print("TEST: fallbacks recomeçam do histórico de antes do turno")
+    chat = LoopingChat()
+    text = asyncio.run(agent.send_to_gemini(chat, ["compara Jett e Raze"], "compara Jett e Raze", None, ""))
+
+    assert text == "Resposta sem ferramentas.", f"Deveria cair na tentativa sem ferramentas: {text}"
+    assert chat.tools_sent[-1] == [], "A última tentativa deveria ir com tools=[]"
+    assert len(chat.tools_sent) == agent.MAX_TOOL_ROUNDS + 3, f"Tentativas inesperadas: {len(chat.tools_sent)}"
+    assert len(chat.history) == 2, f"Só o turno final deveria ficar no histórico: {len(chat.history)}"
+    assert not any(agent.has_function_call(item) for item in chat.history), "Nenhum function_call pendente no histórico"
+
+    # Turno abandonado que terminou pedindo função: sai do histórico antes do próximo
+    chat.send_message("e a Sage?", tools=agent.LOCAL_FUNCTIONS)
+    agent.drop_unanswered_function_call(chat)
+    assert len(chat.history) == 2, f"Turno com function_call sem resposta deveria sair: {len(chat.history)}"
+
+    print(f"✅ {len(chat.tools_sent)} tentativas, histórico com {len(chat.history)} mensagens")
+    return True
+
+
+class FakeCachedContent:
+    """CachedContent simulado: create demora e registra os deletes"""
+    created = []
+    deleted = []
+
+    def __init__(self, name):
+        self.name = name
+        self.expire_time = agent.datetime.datetime.now() + agent.datetime.timedelta(hours=1)
+
+    @classmethod
+    def create(cls, **kwargs):
+        time.sleep(0.3)
+        cls.created.append(kwargs["display_name"])
+        return cls(f"cachedContents/{len(cls.created)}")
+
+    @classmethod
+    def get(cls, name):
+        raise google_exceptions.NotFound("CachedContent not found")
+
+    def delete(self):
+        FakeCachedContent.deleted.append(self.name)
+
+
+class CachedModel:
+    def __init__(self, error):
+        self.error = error
+
+    def start_chat(self, history=None):
+        return self
+
+    def send_message(self, content):
+        raise self.error
+
+
+def test_context_cache():
+    print("\n" + "=" * 50)
+    print("TEST: cache de contexto criado fora do lock e invalidado só se expirou")
+    original = (agent.CONTEXT_CACHE_ENABLED, agent.caching.CachedContent, agent.genai.GenerativeModel.__dict__["from_cached_content"])
+    agent.CONTEXT_CACHE_ENABLED = True
+    agent.caching.CachedContent = FakeCachedContent
+    agent.genai.GenerativeModel.from_cached_content = staticmethod(lambda cached: CachedModel(google_exceptions.TooManyRequests("429")))
+    agent._context_caches.clear()
+    agent.get_store().clear("gemini_cache")
+    try:
+        creator = threading.Thread(target=agent.get_cached_model, args=("search",))
+        creator.start()
+        time.sleep(0.05)
+        start = time.perf_counter()
+        while_creating = agent.get_cached_model("search")
+        waited = time.perf_counter() - start
+        creator.join()
+
+        try:
+            agent.send_turn(LoopingChat(), ["oi"], "search", agent.SEARCH_TOOLS)
+            assert False, "429 no modelo com cache deveria subir"
+        except google_exceptions.TooManyRequests:
+            pass
+        kept = "search" in agent._context_caches
+
+        agent._context_caches["search"][0].error = google_exceptions.NotFound("CachedContent not found")
+        chat = LoopingChat()
+        agent.send_turn(chat, ["oi"], "search", agent.SEARCH_TOOLS)
+    finally:
+        agent.CONTEXT_CACHE_ENABLED, agent.caching.CachedContent, from_cached = original
+        agent.genai.GenerativeModel.from_cached_content = from_cached
+        agent._context_caches.clear()
+
+    assert while_creating is None and waited < 0.1, f"Outra thread não deveria esperar a criação: {waited:.2f}s"
+    assert FakeCachedContent.created == ["vdh-search"], f"Deveria criar uma vez só: {FakeCachedContent.created}"
+    assert kept, "429 não deveria invalidar o cache"
+    assert FakeCachedContent.deleted == ["cachedContents/1"], f"Cache expirado deveria ser apagado: {FakeCachedContent.deleted}"
+    assert chat.tools_sent == [agent.SEARCH_TOOLS], "Cache expirado: o turno vai sem cache"
+
+    print(f"✅ Sem espera durante a criação ({waited * 1000:.0f}ms), cache apagado ao expirar")
+    return True
+
+
+def test_unknown_function():
+    print("\n" + "=" * 50)
+    print("TEST: execute_function_calls() com função desconhecida")
+    calls = [protos.FunctionCall(name="apagar_tudo", args={})]
+    parts = asyncio.run(agent.execute_function_calls(calls))
+
+    response = type(parts[0].function_response).to_dict(parts[0].function_response)["response"]
+    assert "error" in response["result"], f"Deveria devolver erro: {response}"
+
+    print("✅ Erro devolvido ao modelo")
+    return True
+
+
+def test_tool_stats():
+    print("\n" + "=" * 50)
+    print("TEST: get_tool_stats()")
+    agent.tool_turn_stats.clear()
+    agent.record_turn("functions", 2, 0.0)
+    agent.record_turn("search", 0, 0.0)
+
+    stats = agent.get_tool_stats()
+    assert stats["turns"] == 2, "Deveria ter 2 turnos"
+    assert stats["modes"]["functions"]["tool_calls"] == 2, "Deveria contar 2 chamadas"
+
+    print(f"✅ {stats['modes']}")
+    return True
+
+
+def main():
+    print("🧪 TESTES DO FUNCTION CALLING")
+    print("=" * 50)
+
+    tests = [
+        test_send_with_local_tools,
+        test_fallback_restores_history,
+        test_context_cache,
+        test_unknown_function,
+        test_tool_stats,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
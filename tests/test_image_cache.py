@@ -0,0 +1,230 @@
+"""
+Testes do proxy de imagens com cache em disco (CDN simulado, sem rede)
+"""
+import sys
+import os
+import time
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import image_cache
+
+AVATAR_URL = "https://avatars.trackercdn.com/api/avatar/2/abc.png"
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def with_fake_cdn():
+    """Troca fetch_image por um CDN falso que registra as chamadas"""
+    calls = []
+
+    def fake_fetch(url, etag=None, last_modified=None):
+        calls.append({"url": url, "etag": etag})
+        if etag == '"v1"':
+            return {"success": True, "not_modified": True}
+        return {"success": True, "data": PNG_BYTES, "content_type": "image/png", "etag": '"v1"', "last_modified": None}
+
+    image_cache.fetch_image = fake_fetch
+    image_cache.IMAGE_CACHE_DIR = tempfile.mkdtemp()
+    return calls
+
+
+def test_proxy_route_and_disk_cache():
+    print("\n" + "=" * 50)
+    print("TEST: /img/ serve do disco depois da primeira busca")
+    from app import app
+
+    original = image_cache.fetch_image
+    try:
+        calls = with_fake_cdn()
+        url = image_cache.proxy_image_url(AVATAR_URL)
+        client = app.test_client()
+        first = client.get(url)
+        second = client.get(url)
+        revalidated = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        blocked = client.get(image_cache.proxy_image_url("https://example.com/a.png"))
+        forged = client.get("/img/aHR0cHM6Ly9leGFtcGxlLmNvbS9hLnBuZw")
+    finally:
+        image_cache.fetch_image = original
+
+    assert url.startswith("/img/"), f"URL do CDN deveria ser reescrita: {url}"
+    assert first.status_code == 200 and first.data == PNG_BYTES, "Deveria servir a imagem"
+    assert first.mimetype == "image/png", f"Content-Type errado: {first.mimetype}"
+    assert second.data == PNG_BYTES and len(calls) == 1, f"Segunda vez deveria vir do disco: {len(calls)} buscas"
+    assert revalidated.status_code == 304, "If-None-Match igual deveria dar 304"
+    assert blocked.status_code == 404 and forged.status_code == 404, "Domínios fora da lista não passam pelo proxy"
+    assert first.headers["X-Content-Type-Options"] == "nosniff", "Deveria mandar nosniff"
+    assert "sandbox" in first.headers["Content-Security-Policy"], "Deveria mandar CSP com sandbox"
+
+    print(f"✅ 1 busca no CDN, {first.headers['ETag']}, 304 no revalidate")
+    return True
+
+
+def test_stale_copy_revalidated():
+    print("\n" + "=" * 50)
+    print("TEST: cópia velha é revalidada com If-None-Match")
+    original = image_cache.fetch_image
+    original_ttl = image_cache.IMAGE_FRESH_TTL
+    try:
+        calls = with_fake_cdn()
+        image_cache.get_image(AVATAR_URL)
+        image_cache.IMAGE_FRESH_TTL = 0
+        image = image_cache.get_image(AVATAR_URL)
+    finally:
+        image_cache.fetch_image = original
+        image_cache.IMAGE_FRESH_TTL = original_ttl
+
+    assert [c["etag"] for c in calls] == [None, '"v1"'], f"Segunda busca deveria ser condicional: {calls}"
+    assert image["data"] == PNG_BYTES, "304 deveria manter a cópia local"
+
+    print("✅ Revalidado com 304")
+    return True
+
+
+def test_lru_eviction():
+    print("\n" + "=" * 50)
+    print("TEST: cache em disco respeita o limite (LRU)")
+    original = image_cache.fetch_image
+    try:
+        with_fake_cdn()
+        urls = [f"https://titles.trackercdn.com/agents/{i}.png" for i in range(3)]
+        for i, url in enumerate(urls):
+            image_cache.get_image(url)
+            # Horários de acesso distintos: 0 é o mais antigo
+            data_path, _ = image_cache._paths(url)
+            os.utime(data_path, (time.time() - 100 + i, time.time() - 100 + i))
+        image_cache.get_image(urls[0])  # acesso recente: 0 passa a ser o mais novo
+
+        entry_size = len(PNG_BYTES) + 256
+        removed = image_cache.evict_images(max_bytes=2 * entry_size)
+        kept = [os.path.exists(image_cache._paths(url)[0]) for url in urls]
+    finally:
+        image_cache.fetch_image = original
+
+    assert removed == 1, f"Deveria apagar uma imagem: {removed}"
+    assert kept == [True, False, True], f"Deveria apagar a usada há mais tempo: {kept}"
+
+    print("✅ Apagou a menos usada recentemente")
+    return True
+
+
+class FakeScraper:
+    """Scraper do cloudscraper que devolve sempre a mesma resposta"""
+
+    def __init__(self, content_type):
+        self.content_type = content_type
+
+    def get(self, url, headers=None, timeout=None):
+        response = type("Response", (), {})()
+        response.status_code = 200
+        response.headers = {"Content-Type": self.content_type}
+        response.content = b"<svg onload='alert(1)'/>"
+        return response
+
+
+def test_svg_rejected():
+    print("\n" + "=" * 50)
+    print("TEST: SVG não passa pelo proxy")
+    original = image_cache.cloudscraper.create_scraper
+    try:
+        image_cache.cloudscraper.create_scraper = lambda **kwargs: FakeScraper("image/svg+xml; charset=utf-8")
+        result = image_cache.fetch_image("https://titles.trackercdn.com/a.svg")
+    finally:
+        image_cache.cloudscraper.create_scraper = original
+
+    assert not result["success"] and "svg" in result["error"], f"SVG deveria ser recusado: {result}"
+
+    print(f"✅ {result['error']}")
+    return True
+
+
+def test_size_tracked_without_walking():
+    print("\n" + "=" * 50)
+    print("TEST: escritas não varrem o cache inteiro")
+    original = (image_cache.fetch_image, image_cache._scan_entries, image_cache.IMAGE_CACHE_MAX_BYTES)
+    scans = []
+    try:
+        with_fake_cdn()
+        image_cache._scan_entries = lambda: scans.append(1) or original[1]()
+        for i in range(5):
+            image_cache.get_image(f"https://titles.trackercdn.com/agents/{i}.png")
+        scans_before_limit = len(scans)
+        limit = image_cache.IMAGE_CACHE_MAX_BYTES = 3 * (len(PNG_BYTES) + image_cache.ENTRY_OVERHEAD)
+        image_cache.get_image("https://titles.trackercdn.com/agents/5.png")
+        total = image_cache._cache_bytes[image_cache.IMAGE_CACHE_DIR]
+    finally:
+        image_cache.fetch_image, image_cache._scan_entries, image_cache.IMAGE_CACHE_MAX_BYTES = original
+
+    assert scans_before_limit == 1, f"Só a primeira escrita deveria medir o disco: {scans_before_limit}"
+    assert len(scans) == 2, "Passar do limite deveria varrer para apagar"
+    assert total == limit, f"Total deveria ser recalculado após apagar: {total}"
+
+    print(f"✅ {len(scans)} varreduras em 6 escritas")
+    return True
+
+
+def test_profile_absolute_image_urls():
+    print("\n" + "=" * 50)
+    print("TEST: /api/profile devolve URLs absolutas das imagens")
+    import agent
+    from app import app
+    from store import get_store
+
+    def fake_fetch(riot_id):
+        return {"success": True, "data": {"data": {
+            "platformInfo": {"platformUserHandle": riot_id, "avatarUrl": AVATAR_URL},
+            "metadata": {},
+            "segments": [{"type": "agent", "metadata": {"name": "Jett", "imageUrl": "https://titles.trackercdn.com/jett.png"}, "stats": {}}],
+        }}}
+
+    original = agent.fetch_tracker_api
+    try:
+        agent.fetch_tracker_api = fake_fetch
+        get_store().clear("profiles")
+        profile = app.test_client().get("/api/profile/A%231", base_url="https://vdh.example").get_json()
+    finally:
+        agent.fetch_tracker_api = original
+        get_store().clear("profiles")
+
+    assert profile["avatar"].startswith("https://vdh.example/img/"), f"Avatar deveria ser absoluto: {profile['avatar']}"
+    assert profile["top_agents"][0]["image"].startswith("https://vdh.example/img/"), "Imagem do agente deveria ser absoluta"
+
+    print(f"✅ {profile['avatar'][:40]}...")
+    return True
+
+
+def main():
+    print("🧪 TESTES DO PROXY DE IMAGENS")
+    print("=" * 50)
+
+    tests = [
+        test_proxy_route_and_disk_cache,
+        test_stale_copy_revalidated,
+        test_lru_eviction,
+        test_svg_rejected,
+        test_size_tracked_without_walking,
+        test_profile_absolute_image_urls,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
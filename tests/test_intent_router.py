@@ -0,0 +1,167 @@
+"""
+Testes do roteador local de intenções (sem Gemini)
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.intent_router import (
+    ROUTE_AGENT_INFO,
+    ROUTE_COMPOSITION,
+    ROUTE_LLM,
+    ROUTE_MAPS,
+    answer_locally,
+    classify_intent,
+    get_route_stats,
+    record_route,
+    reset_route_stats,
+)
+
+
+def test_composition_route():
+    print("\n" + "=" * 50)
+    print("TEST: classify_intent('analisa a comp Jett Omen Sova Killjoy Sage')")
+    intent = classify_intent("analisa a comp Jett Omen Sova Killjoy Sage")
+
+    assert intent["route"] == ROUTE_COMPOSITION, f"Deveria ser composição: {intent}"
+    assert intent["agents"] == ["Jett", "Omen", "Sova", "Killjoy", "Sage"], "Deveria manter a ordem"
+
+    answer = answer_locally(intent)
+    assert "10/10" in answer, f"Comp completa deveria ter nota 10: {answer}"
+
+    print(f"✅ {intent['agents']}")
+    return True
+
+
+def test_composition_names_only():
+    print("\n" + "=" * 50)
+    print("TEST: classify_intent('jett, kay/o, viper')")
+    intent = classify_intent("jett, kay/o, viper")
+
+    assert intent["route"] == ROUTE_COMPOSITION, f"Deveria ser composição: {intent}"
+    assert "KAY/O" in intent["agents"], "KAY/O deveria ser reconhecido"
+
+    print(f"✅ {intent['agents']}")
+    return True
+
+
+def test_unknown_names_not_scored():
+    print("\n" + "=" * 50)
+    print("TEST: comp com palavra que não é agente ou mais de 5 agentes vai para o Gemini")
+    exact = classify_intent("analisa a comp jett omen sova kj sage")
+    typo = classify_intent("analisa a comp jett omen sova killjoi sage")
+    unknown = classify_intent("analisa a comp xyzzy omen sova killjoy sage")
+    seven = classify_intent("analisa a comp jett omen sova killjoy sage raze viper")
+
+    assert exact["route"] == ROUTE_COMPOSITION, f"Nomes e apelidos exatos ficam locais: {exact}"
+    assert "10/10" in answer_locally(exact), "Comp completa deveria ter nota 10"
+    assert typo["route"] == ROUTE_LLM, f"Erro de digitação não é adivinhado no roteador: {typo}"
+    assert unknown["route"] == ROUTE_LLM, f"Nome não reconhecido não pode ser descartado: {unknown}"
+    assert seven["route"] == ROUTE_LLM, f"7 agentes não cabem numa comp: {seven}"
+
+    for word in ("agora", "outra", "fazer", "saber", "jeito"):
+        comp = classify_intent(f"analisa meu time {word}: jett omen sova kj")
+        info = classify_intent(f"qual a função da jett no time {word}")
+        assert comp["route"] == ROUTE_LLM, f"'{word}' não é agente: {comp}"
+        assert info["route"] == ROUTE_LLM, f"'{word}' não é agente: {info}"
+
+    print("✅ Só nomes exatos ficam locais; o resto vai para o Gemini")
+    return True
+
+
+def test_agent_info_route():
+    print("\n" + "=" * 50)
+    print("TEST: classify_intent('qual a função da Viper?')")
+    intent = classify_intent("qual a função da Viper?")
+
+    assert intent["route"] == ROUTE_AGENT_INFO, f"Deveria ser info de agente: {intent}"
+    assert "Controller" in answer_locally(intent), "Viper deveria ser Controller"
+
+    print("✅ Viper: Controller")
+    return True
+
+
+def test_maps_route():
+    print("\n" + "=" * 50)
+    print("TEST: classify_intent('quais mapas estão ativos')")
+    intent = classify_intent("quais mapas estão ativos")
+
+    assert intent["route"] == ROUTE_MAPS, f"Deveria ser mapas: {intent}"
+    assert "Ascent" in answer_locally(intent), "Deveria listar Ascent"
+
+    print("✅ Mapas listados")
+    return True
+
+
+def test_open_ended_goes_to_llm():
+    print("\n" + "=" * 50)
+    print("TEST: perguntas abertas vão para o Gemini")
+    messages = [
+        "Qual a tier list atual dos agentes?",
+        "Quais os melhores agentes para o mapa bind?",
+        "o que pickar com Jett e Omen contra Reyna?",
+        "analisa a comp Jett Omen Sova Killjoy Sage em Bind",
+    ]
+
+    for message in messages:
+        intent = classify_intent(message)
+        assert intent["route"] == ROUTE_LLM, f"'{message}' deveria ir para o LLM: {intent}"
+
+    print(f"✅ {len(messages)} mensagens roteadas para o LLM")
+    return True
+
+
+def test_route_stats():
+    print("\n" + "=" * 50)
+    print("TEST: get_route_stats()")
+    reset_route_stats()
+    record_route(ROUTE_MAPS)
+    record_route(ROUTE_MAPS)
+    record_route(ROUTE_LLM)
+
+    stats = get_route_stats()
+    assert stats["total"] == 3, "Deveria contar 3 requisições"
+    assert stats["routes"][ROUTE_MAPS] == 2, "Deveria contar 2 em mapas"
+    assert stats["local_ratio"] == round(2 / 3, 3), "2/3 deveriam ser locais"
+
+    print(f"✅ {stats}")
+    return True
+
+
+def main():
+    print("🧪 TESTES DO ROTEADOR DE INTENÇÕES")
+    print("=" * 50)
+
+    tests = [
+        test_composition_route,
+        test_composition_names_only,
+        test_unknown_names_not_scored,
+        test_agent_info_route,
+        test_maps_route,
+        test_open_ended_goes_to_llm,
+        test_route_stats,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,194 @@
+"""
+Testes da ingestão incremental do histórico de partidas (Tracker.gg simulado)
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import match_history
+from store import get_store
+
+
+def fake_match(match_id: int, agent: str, map_name: str, won: bool) -> dict:
+    """Partida mínima no formato da API do Tracker.gg"""
+    return {
+        "attributes": {"id": f"m{match_id}"},
+        "metadata": {"mapName": map_name, "timestamp": f"2025-12-{match_id:02d}"},
+        "segments": [{
+            "type": "overview",
+            "metadata": {"agentName": agent, "result": "victory" if won else "defeat"},
+            "stats": {"kills": {"value": 20}, "deaths": {"value": 10}, "roundsPlayed": {"value": 20}, "damage": {"value": 3000}, "headshots": {"value": 5}},
+        }],
+    }
+
+
+class FakeTracker:
+    """Histórico paginado (mais nova primeiro) que conta as páginas pedidas"""
+
+    def __init__(self, matches, page_size=3, delay=0):
+        self.matches = matches
+        self.page_size = page_size
+        self.delay = delay
+        self.pages_fetched = 0
+
+    def fetch(self, riot_id, cursor=None, timeout=None):
+        time.sleep(self.delay)
+        self.pages_fetched += 1
+        start = int(cursor or 0)
+        page = self.matches[start:start + self.page_size]
+        next_cursor = str(start + self.page_size) if start + self.page_size < len(self.matches) else None
+        return {"success": True, "matches": page, "next": next_cursor}
+
+
+def with_fake_tracker(tracker: FakeTracker):
+    match_history.fetch_match_page = tracker.fetch
+    get_store().clear("match_aggregates")
+
+
+def test_full_then_incremental():
+    print("\n" + "=" * 50)
+    print("TEST: primeira ingestão lê tudo, a segunda só o que é novo")
+    original = match_history.fetch_match_page
+    history = [fake_match(i, "Jett" if i % 2 else "Omen", "Bind" if i < 5 else "Haven", i % 3 != 0) for i in range(10, 0, -1)]
+    tracker = FakeTracker(history)
+    try:
+        with_fake_tracker(tracker)
+        first = match_history.ingest_match_history("A#1")
+        pages_first = tracker.pages_fetched
+
+        # Duas partidas novas no topo
+        tracker.matches = [fake_match(12, "Jett", "Bind", True), fake_match(11, "Sova", "Bind", False)] + history
+        tracker.pages_fetched = 0
+        second = match_history.ingest_match_history("A#1")
+    finally:
+        match_history.fetch_match_page = original
+
+    assert first["new_matches"] == 10 and pages_first == 4, f"Primeira ingestão errada: {first['new_matches']} em {pages_first} páginas"
+    assert second["new_matches"] == 2, f"Deveria somar só as 2 novas: {second['new_matches']}"
+    assert tracker.pages_fetched == 1, f"Deveria parar na primeira página: {tracker.pages_fetched}"
+
+    aggregates = second["aggregates"]
+    assert aggregates["matches"] == 12, "Total deveria ser 12"
+    assert aggregates["last_match_id"] == "m12", "Deveria lembrar a partida mais nova"
+    assert aggregates["agents"]["Sova"]["matches"] == 1, "Sova deveria ter 1 partida"
+    assert aggregates["maps"]["Bind"]["matches"] == 6, f"Bind deveria ter 6 partidas: {aggregates['maps']['Bind']}"
+    assert aggregates["recent"][0]["agent"] == "Jett" and aggregates["recent"][1]["agent"] == "Sova", "Forma recente fora de ordem"
+
+    summary = match_history.summarize_aggregates(aggregates)
+    assert summary["agents"]["Jett"]["kd"] == 2.0, "K/D deveria ser 2.0"
+    assert summary["agents"]["Jett"]["hs_pct"] == 25.0, f"HS% deveria ser 5 de 20 kills: {summary['agents']['Jett']}"
+    assert summary["recent_form"]["matches"] == 12, "Forma recente deveria ter 12 partidas"
+
+    print(f"✅ {aggregates['matches']} partidas, forma: {summary['recent_form']['results']}")
+    return True
+
+
+def test_failed_page_keeps_previous_state():
+    print("\n" + "=" * 50)
+    print("TEST: falha no meio não marca partidas como vistas")
+    original = match_history.fetch_match_page
+    tracker = FakeTracker([fake_match(i, "Jett", "Bind", True) for i in range(6, 0, -1)])
+    try:
+        with_fake_tracker(tracker)
+        match_history.fetch_match_page = lambda riot_id, cursor=None, timeout=None: (
+            tracker.fetch(riot_id, cursor) if not cursor else {"success": False, "error": "Erro HTTP 500"}
+        )
+        result = match_history.ingest_match_history("A#1")
+    finally:
+        match_history.fetch_match_page = original
+
+    assert result["error"] == "Erro HTTP 500", f"Deveria devolver o erro: {result}"
+    assert result["aggregates"]["last_match_id"] is None, "Não deveria gravar agregados parciais"
+
+    print("✅ Estado anterior preservado")
+    return True
+
+
+def test_stops_at_time_and_skips_missing_ids():
+    print("\n" + "=" * 50)
+    print("TEST: para pelo horário se a última partida sumir e pula partidas sem id")
+    original = match_history.fetch_match_page
+    history = [fake_match(i, "Jett", "Bind", True) for i in range(5, 0, -1)]
+    tracker = FakeTracker(history)
+    try:
+        with_fake_tracker(tracker)
+        match_history.ingest_match_history("A#1")
+
+        no_id = fake_match(6, "Omen", "Bind", True)
+        no_id["attributes"] = {}
+        # m5 (a última ingerida) sumiu do histórico
+        tracker.matches = [fake_match(7, "Sova", "Bind", True), no_id, fake_match(6, "Sova", "Bind", False)] + history[1:]
+        tracker.pages_fetched = 0
+        second = match_history.ingest_match_history("A#1")
+    finally:
+        match_history.fetch_match_page = original
+
+    assert second["new_matches"] == 2, f"Deveria somar só m7 e m6: {second['new_matches']}"
+    assert second["aggregates"]["matches"] == 7, f"Partidas antigas não podem ser somadas de novo: {second['aggregates']['matches']}"
+    assert "Omen" not in second["aggregates"]["agents"], "Partida sem id deveria ser pulada"
+
+    print(f"✅ {second['new_matches']} novas em {tracker.pages_fetched} página(s)")
+    return True
+
+
+def test_budget_limits_ingestion():
+    print("\n" + "=" * 50)
+    print("TEST: prazo limita a leitura do histórico")
+    original = match_history.fetch_match_page
+    history = [fake_match(i, "Jett", "Bind", True) for i in range(10, 0, -1)]
+    tracker = FakeTracker(history, delay=0.2)
+    try:
+        with_fake_tracker(tracker)
+        start = time.perf_counter()
+        first = match_history.ingest_match_history("A#1", budget=0.3)
+        elapsed = time.perf_counter() - start
+
+        tracker.matches = [fake_match(i, "Sova", "Bind", True) for i in range(20, 10, -1)] + history
+        update = match_history.ingest_match_history("A#1", budget=0.3)
+    finally:
+        match_history.fetch_match_page = original
+
+    assert elapsed < 0.5, f"Deveria parar no prazo: {elapsed:.2f}s"
+    assert first["partial"] and first["new_matches"] == 6, f"Primeira ingestão grava o que leu: {first}"
+    assert update["partial"] and "error" in update, f"Atualização incompleta não deveria ser gravada: {update}"
+    assert update["aggregates"]["matches"] == 6, "Agregados deveriam continuar os da primeira ingestão"
+
+    print(f"✅ {first['new_matches']} partidas em {elapsed:.2f}s, atualização incompleta descartada")
+    return True
+
+
+def main():
+    print("🧪 TESTES DO HISTÓRICO DE PARTIDAS")
+    print("=" * 50)
+
+    tests = [
+        test_full_then_incremental,
+        test_failed_page_keeps_previous_state,
+        test_stops_at_time_and_skips_missing_ids,
+        test_budget_limits_ingestion,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,181 @@
+"""
+Testes da busca de perfis em paralelo (Tracker.gg simulado, sem rede)
+"""
+import sys
+import os
+import time
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent
+from store import get_store
+from tests.fakes import with_fake_tracker
+
+
+def test_extract_riot_ids():
+    print("\n" + "=" * 50)
+    print("TEST: extract_riot_ids()")
+    riot_ids = agent.extract_riot_ids("eu sou A#1, meu duo é B#2, contra C#3 (de novo a#1)")
+
+    assert riot_ids == ["A#1", "B#2", "C#3"], f"Deveria extrair os 3 IDs sem repetir: {riot_ids}"
+
+    print(f"✅ {riot_ids}")
+    return True
+
+
+def test_fetch_profiles_concurrent():
+    print("\n" + "=" * 50)
+    print("TEST: fetch_profiles() em paralelo")
+    original = agent.fetch_tracker_api
+    try:
+        with_fake_tracker({"A#1": 0.3, "B#2": 0.3, "C#3": 0.3})
+        start = time.perf_counter()
+        profiles = asyncio.run(agent.fetch_profiles(["A#1", "B#2", "C#3"]))
+        elapsed = time.perf_counter() - start
+    finally:
+        agent.fetch_tracker_api = original
+
+    assert all(p.get("found") for p in profiles.values()), f"Todos deveriam ser encontrados: {profiles}"
+    assert elapsed < 0.6, f"Deveria custar a latência de uma busca, levou {elapsed:.2f}s"
+
+    print(f"✅ 3 perfis em {elapsed:.2f}s")
+    return True
+
+
+def test_fetch_profiles_deadline():
+    print("\n" + "=" * 50)
+    print("TEST: fetch_profiles() respeita o prazo")
+    original = agent.fetch_tracker_api
+    try:
+        with_fake_tracker({"A#1": 0.0, "B#2": 2.0})
+        start = time.perf_counter()
+        profiles = asyncio.run(agent.fetch_profiles(["A#1", "B#2"], deadline=0.3))
+        elapsed = time.perf_counter() - start
+    finally:
+        agent.fetch_tracker_api = original
+
+    assert profiles["A#1"].get("found"), "O perfil rápido deveria chegar"
+    assert "error" in profiles["B#2"], "O perfil lento deveria estourar o prazo"
+    assert elapsed < 1.0, f"Não deveria esperar o perfil lento, levou {elapsed:.2f}s"
+
+    print(f"✅ Prazo respeitado em {elapsed:.2f}s")
+    return True
+
+
+def test_format_player_context():
+    print("\n" + "=" * 50)
+    print("TEST: format_player_context() junta os jogadores")
+    original = agent.fetch_tracker_api
+    try:
+        with_fake_tracker({})
+        profiles = asyncio.run(agent.fetch_profiles(["A#1", "B#2"]))
+    finally:
+        agent.fetch_tracker_api = original
+
+    profiles["C#3"] = {"error": "Perfil não encontrado"}
+    context = agent.format_player_context(profiles)
+
+    assert context.count("[CONTEXTO DOS JOGADORES") == 1, "Deveria ter um único bloco"
+    assert "A#1" in context and "B#2" in context, "Deveria ter os dois jogadores"
+    assert "C#3" not in context, "Perfis com erro ficam de fora"
+
+    print("✅ Bloco único com 2 jogadores")
+    return True
+
+
+def test_player_context_sent_once():
+    print("\n" + "=" * 50)
+    print("TEST: contexto do jogador vai uma vez por sessão")
+    original = agent.fetch_tracker_api
+    try:
+        with_fake_tracker({})
+        profiles = asyncio.run(agent.fetch_profiles(["A#1", "B#2"]))
+    finally:
+        agent.fetch_tracker_api = original
+
+    class Chat:
+        history = []
+
+    chat = Chat()
+    get_store().delete("session_context", "s-ctx")
+    first, pending, saved_first = agent.select_player_context("s-ctx", chat, {"A#1": profiles["A#1"]})
+    agent.mark_player_context_sent("s-ctx", pending)
+
+    chat.history = ["turno anterior"]
+    second, pending, saved_second = agent.select_player_context("s-ctx", chat, profiles)
+
+    assert "A#1" in first and saved_first == 0, "Primeiro turno manda o contexto completo"
+    assert "B#2" in second and "A#1" not in second, f"Só o jogador novo deveria ir: {second}"
+    assert list(pending) == ["b#2"] and saved_second > 0, "Deveria contar os tokens não reenviados"
+
+    chat.history = []
+    fresh, _, _ = agent.select_player_context("s-ctx", chat, profiles)
+    assert "A#1" in fresh, "Histórico vazio (chat novo) manda tudo de novo"
+
+    print(f"✅ {saved_second} tokens de contexto economizados no segundo turno")
+    return True
+
+
+def test_api_profile_etag():
+    print("\n" + "=" * 50)
+    print("TEST: /api/profile com ETag e 304")
+    from app import app
+
+    original = agent.fetch_tracker_api
+    try:
+        with_fake_tracker({})
+        client = app.test_client()
+        first = client.get("/api/profile/A%231")
+        second = client.get("/api/profile/A%231", headers={"If-None-Match": first.headers["ETag"]})
+        missing = client.get("/api/profile/sem-tag")
+    finally:
+        agent.fetch_tracker_api = original
+
+    assert first.status_code == 200, f"Deveria retornar 200: {first.status_code}"
+    assert first.get_json()["name"] == "A#1", "Deveria retornar o perfil em JSON"
+    assert first.headers.get("ETag"), "Deveria ter ETag"
+    max_age = first.cache_control.max_age
+    assert 0 < max_age <= agent.PROFILE_CACHE_TTL, f"max-age deveria seguir o TTL: {max_age}"
+    assert second.status_code == 304 and not second.data, "If-None-Match igual deveria dar 304 sem corpo"
+    assert missing.status_code == 400, "Riot ID sem # deveria dar 400"
+
+    print(f"✅ ETag {first.headers['ETag']}, max-age={max_age}, 304 no revalidate")
+    return True
+
+
+def main():
+    print("🧪 TESTES DA BUSCA DE PERFIS")
+    print("=" * 50)
+
+    tests = [
+        test_extract_riot_ids,
+        test_fetch_profiles_concurrent,
+        test_fetch_profiles_deadline,
+        test_format_player_context,
+        test_player_context_sent_once,
+        test_api_profile_etag,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,162 @@
+"""
+Testes das rotas de profiling de admin (Gemini simulado, sem rede)
+"""
+import sys
+import os
+import time
+import pstats
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent
+import profiling
+from app import app
+
+ADMIN_HEADERS = {"Authorization": "Bearer segredo"}
+
+
+class FakeResponse:
+    candidates = []
+    text = "ok"
+
+
+class FakeChat:
+    history = []
+
+    def send_message(self, content, tools=None):
+        time.sleep(0.05)
+        return FakeResponse()
+
+
+class FakeModel:
+    def start_chat(self, history=None):
+        return FakeChat()
+
+
+def run_chats(client, count):
+    for i in range(count):
+        response = client.post("/chat", json={"message": f"qual o meta atual? {i}"})
+        assert response.status_code == 200, f"/chat falhou: {response.get_json()}"
+
+
+def setup():
+    os.environ["VDH_ADMIN_TOKEN"] = "segredo"
+    profiling.PROFILE_DIR = tempfile.mkdtemp()
+    original = agent.model
+    agent.model = FakeModel()
+    agent.chat_sessions.clear()
+    return original
+
+
+def test_admin_token_required():
+    print("\n" + "=" * 50)
+    print("TEST: rotas de admin exigem o token")
+    client = app.test_client()
+    os.environ.pop("VDH_ADMIN_TOKEN", None)
+    disabled = client.get("/admin/profile", headers=ADMIN_HEADERS)
+    os.environ["VDH_ADMIN_TOKEN"] = "segredo"
+    wrong = client.get("/admin/profile", headers={"Authorization": "Bearer errado"})
+    ok = client.get("/admin/profile", headers=ADMIN_HEADERS)
+
+    assert disabled.status_code == 404, "Sem VDH_ADMIN_TOKEN as rotas ficam desligadas"
+    assert wrong.status_code == 404, "Token errado deveria dar 404"
+    assert ok.status_code == 200, "Token certo deveria passar"
+
+    print("✅ 404 sem token, 200 com token")
+    return True
+
+
+def test_sampler_and_cprofile_captures():
+    print("\n" + "=" * 50)
+    print("TEST: captura dos próximos N /chat (sampler e cProfile)")
+    original = setup()
+    try:
+        client = app.test_client()
+        client.post("/admin/profile/start", json={"mode": "sampler", "requests": 2}, headers=ADMIN_HEADERS)
+        run_chats(client, 3)
+        sampler = client.get("/admin/profile", headers=ADMIN_HEADERS).get_json()["captures"][-1]
+        folded = client.get(f"/admin/profile/files/{sampler['files'][0]}", headers=ADMIN_HEADERS)
+
+        client.post("/admin/profile/start", json={"mode": "cprofile", "requests": 1}, headers=ADMIN_HEADERS)
+        run_chats(client, 1)
+        cprofile = client.get("/admin/profile", headers=ADMIN_HEADERS).get_json()["captures"][-1]
+        invalid = client.post("/admin/profile/start", json={"mode": "perf"}, headers=ADMIN_HEADERS)
+    finally:
+        agent.model = original
+
+    assert sampler["finished"] and sampler["completed"] == 2, f"Deveria parar após 2 pedidos: {sampler}"
+    assert sampler["samples"] > 0, "Deveria ter amostras de pilha"
+    lines = folded.data.decode("utf-8").splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines), "Formato de pilhas colapsadas: 'a;b;c N'"
+    assert any(line.startswith("[gemini];") and "send_turn" in line for line in lines), "Deveria amostrar a chamada ao Gemini no pool"
+
+    pstats_file = next(f for f in cprofile["files"] if f.endswith(".pstats"))
+    stats = pstats.Stats(os.path.join(profiling.PROFILE_DIR, pstats_file))
+    assert any(func[2] == "process_message" for func in stats.stats), "O .pstats deveria ter process_message"
+    assert invalid.status_code == 400, "Modo inválido deveria dar 400"
+
+    print(f"✅ {sampler['samples']} amostras, {len(stats.stats)} funções no .pstats")
+    return True
+
+
+def test_memory_snapshot():
+    print("\n" + "=" * 50)
+    print("TEST: snapshot do tracemalloc com maiores alocações")
+    client = app.test_client()
+    profiling.PROFILE_DIR = tempfile.mkdtemp()
+    os.environ["VDH_ADMIN_TOKEN"] = "segredo"
+    try:
+        before = client.get("/admin/profile/memory", headers=ADMIN_HEADERS)
+        client.post("/admin/profile/memory/start", headers=ADMIN_HEADERS)
+        first = client.get("/admin/profile/memory", headers=ADMIN_HEADERS).get_json()
+        buffers = [bytearray(64 * 1024) for _ in range(20)]
+        second = client.get("/admin/profile/memory?limit=5", headers=ADMIN_HEADERS).get_json()
+        download = client.get(f"/admin/profile/files/{second['file']}", headers=ADMIN_HEADERS)
+    finally:
+        client.post("/admin/profile/memory/stop", headers=ADMIN_HEADERS)
+
+    assert before.status_code == 409, "Sem tracemalloc ligado deveria dar 409"
+    assert first["top"] and "growth" not in first, "Primeiro snapshot sem comparação"
+    assert len(second["top"]) <= 5, "Deveria respeitar o limit"
+    grew = second["growth"][0]
+    assert grew["size_diff_kb"] >= 1000 and "test_profiling.py" in grew["where"][0], f"Maior crescimento deveria ser os buffers: {grew}"
+    assert download.status_code == 200 and download.data, "Snapshot deveria ser baixável"
+    del buffers
+
+    print(f"✅ +{grew['size_diff_kb']} KB em {grew['where'][0]}")
+    return True
+
+
+def main():
+    print("🧪 TESTES DE PROFILING")
+    print("=" * 50)
+
+    tests = [
+        test_admin_token_required,
+        test_sampler_and_cprofile_captures,
+        test_memory_snapshot,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,200 @@
+"""
+Testes de isolamento de sessões do /chat (Gemini simulado, sem rede)
+"""
+import sys
+import os
+import time
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent
+from app import app
+
+
+class FakeResponse:
+    candidates = []
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeChat:
+    """Guarda as mensagens e detecta turnos simultâneos na mesma sessão"""
+
+    def __init__(self):
+        self.history = []
+        self.active = 0
+        self.overlaps = 0
+
+    def send_message(self, content, tools=None):
+        self.active += 1
+        if self.active > 1:
+            self.overlaps += 1
+        time.sleep(0.1)
+        self.history.append(content[-1])
+        self.active -= 1
+        return FakeResponse(f"ok: {content[-1]}")
+
+
+class FakeModel:
+    def __init__(self):
+        self.chats = []
+
+    def start_chat(self, history=None):
+        chat = FakeChat()
+        self.chats.append(chat)
+        return chat
+
+
+def test_sessions_isolated_and_parallel():
+    print("\n" + "=" * 50)
+    print("TEST: sessões isoladas, serializadas e em paralelo")
+    original_model = agent.model
+    agent.model = FakeModel()
+    agent.chat_sessions.clear()
+
+    sessions = 4
+    turns = 3
+    threads_per_session = 2
+    errors = []
+
+    def run_session(index):
+        client = app.test_client()
+        client.get('/')
+        tab_threads = []
+
+        def send(n):
+            for t in range(turns):
+                response = client.post('/chat', json={"message": f"sessao {index} thread {n} turno {t}"})
+                if response.status_code != 200:
+                    errors.append(response.get_json())
+
+        # Duas abas da mesma sessão mandando mensagens ao mesmo tempo
+        for n in range(threads_per_session):
+            thread = threading.Thread(target=send, args=(n,))
+            tab_threads.append(thread)
+            thread.start()
+        for thread in tab_threads:
+            thread.join()
+
+    try:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=run_session, args=(i,)) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        chats = list(agent.chat_sessions.values())
+    finally:
+        agent.model = original_model
+        agent.chat_sessions.clear()
+
+    assert not errors, f"Requisições falharam: {errors}"
+    assert len(chats) == sessions, f"Deveria ter {sessions} sessões de chat: {len(chats)}"
+
+    for chat in chats:
+        owners = {message.split()[1] for message in chat.history}
+        assert len(owners) == 1, f"Histórico misturou sessões: {chat.history}"
+        assert len(chat.history) == turns * threads_per_session, f"Turnos perdidos: {chat.history}"
+        assert chat.overlaps == 0, "Turnos da mesma sessão rodaram ao mesmo tempo"
+
+    serial_time = sessions * turns * threads_per_session * 0.1
+    assert elapsed < serial_time * 0.6, f"Sessões deveriam rodar em paralelo ({elapsed:.2f}s de {serial_time:.2f}s)"
+
+    print(f"✅ {sessions} sessões em {elapsed:.2f}s (serial seria {serial_time:.2f}s)")
+    return True
+
+
+def test_clear_only_own_session():
+    print("\n" + "=" * 50)
+    print("TEST: /clear limpa apenas a própria sessão")
+    original_model = agent.model
+    agent.model = FakeModel()
+    agent.chat_sessions.clear()
+
+    try:
+        first = app.test_client()
+        second = app.test_client()
+        first.post('/chat', json={"message": "oi sessao um"})
+        second.post('/chat', json={"message": "oi sessao dois"})
+        first.post('/clear')
+        remaining = [chat.history for chat in agent.chat_sessions.values()]
+    finally:
+        agent.model = original_model
+        agent.chat_sessions.clear()
+
+    assert len(remaining) == 1, f"Deveria sobrar um histórico: {remaining}"
+    assert remaining[0] == ["oi sessao dois"], "Deveria sobrar a segunda sessão"
+
+    print("✅ Segunda sessão preservada")
+    return True
+
+
+def test_idle_sessions_evicted():
+    print("\n" + "=" * 50)
+    print("TEST: sessões paradas e além do limite saem da memória")
+    original = (agent.model, agent.MAX_CHAT_SESSIONS)
+    agent.model = FakeModel()
+    agent.MAX_CHAT_SESSIONS = 3
+    agent.chat_sessions.clear()
+    store = agent.get_store()
+
+    try:
+        agent.get_chat("parada")
+        agent.mark_player_context_sent("parada", {"A#1": "abc"})
+        agent._chat_last_used["parada"] = time.time() - agent.SESSION_IDLE_TTL - 1
+        agent.get_chat("ativa")
+        idle_evicted = "parada" not in agent.chat_sessions
+        context_cleared = store.get("session_context", "parada") is None
+
+        for name in ("b", "c", "d"):
+            agent.get_chat(name)
+        agent.get_chat("b")
+        agent.get_chat("e")
+        kept = list(agent.chat_sessions)
+    finally:
+        agent.model, agent.MAX_CHAT_SESSIONS = original
+        agent.chat_sessions.clear()
+
+    assert idle_evicted, "Sessão parada além do TTL deveria sair"
+    assert context_cleared, "O contexto marcado como enviado deveria sair junto"
+    assert kept == ["d", "b", "e"], f"Deveria manter as 3 usadas mais recentemente: {kept}"
+
+    print(f"✅ Sessões mantidas: {kept}")
+    return True
+
+
+def main():
+    print("🧪 TESTES DE SESSÕES")
+    print("=" * 50)
+
+    tests = [
+        test_sessions_isolated_and_parallel,
+        test_clear_only_own_session,
+        test_idle_sessions_evicted,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
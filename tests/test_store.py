@@ -0,0 +1,174 @@
+"""
+Testes do store compartilhado (SQLite) usado no modo multi-worker
+"""
+import sys
+import os
+import time
+import tempfile
+import multiprocessing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.generativeai import protos
+
+import store as store_module
+from store import SQLiteStore, MemoryStore
+
+
+def new_store() -> SQLiteStore:
+    return SQLiteStore(os.path.join(tempfile.mkdtemp(), "store.sqlite3"))
+
+
+def test_ttl():
+    print("\n" + "=" * 50)
+    print("TEST: SQLiteStore respeita o TTL")
+    store = new_store()
+    store.set("profiles", "a#1", {"profile": {"name": "A"}}, ttl=0.2)
+
+    assert store.get("profiles", "a#1")["profile"]["name"] == "A", "Deveria ler o valor"
+    time.sleep(0.3)
+    assert store.get("profiles", "a#1") is None, "Valor deveria expirar"
+
+    print("✅ Expirou no tempo certo")
+    return True
+
+
+def test_history_roundtrip():
+    print("\n" + "=" * 50)
+    print("TEST: histórico de chat sobrevive à serialização")
+    store = new_store()
+    history = [
+        protos.Content(role="user", parts=[protos.Part(text="oi"), protos.Part(inline_data=protos.Blob(mime_type="image/png", data=b"\x89PNG"))]),
+        protos.Content(role="model", parts=[protos.Part(text="Envie apenas imagens da tela de seleção de agentes.")]),
+    ]
+    store.save_history("s1", [type(c).to_json(c) for c in history])
+
+    # Outro "worker" abre o mesmo arquivo
+    loaded = [protos.Content.from_json(item) for item in SQLiteStore(store.path).load_history("s1")]
+
+    assert loaded == history, "Histórico deveria voltar igual"
+
+    print("✅ Histórico igual após ida e volta")
+    return True
+
+
+def test_purge():
+    print("\n" + "=" * 50)
+    print("TEST: purge() apaga históricos e locks parados")
+    results = {}
+    for store in (new_store(), MemoryStore()):
+        store.save_history("velha", ["a"])
+        store.session_lock("velha")
+        time.sleep(0.05)
+        store.save_history("nova", ["b"])
+        with store.session_lock("nova"):
+            removed = store.purge(max_idle=0.03)
+        results[type(store).__name__] = (removed, store.load_history("velha"), store.load_history("nova"))
+
+    for name, (removed, old, new) in results.items():
+        assert removed == 1 and old == [] and new == ["b"], f"{name}: deveria apagar só a sessão parada: {results[name]}"
+
+    print(f"✅ {results}")
+    return True
+
+
+def test_expired_rows_purged():
+    print("\n" + "=" * 50)
+    print("TEST: linhas vencidas saem ao abrir o store e a cada N escritas")
+    original = store_module.PURGE_EVERY_WRITES
+    store_module.PURGE_EVERY_WRITES = 5
+
+    def kv_rows(store):
+        return store._conn().execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    try:
+        store = new_store()
+        for i in range(3):
+            store.set("answers", str(i), "x", ttl=0.05)
+        time.sleep(0.1)
+        before = kv_rows(store)
+        reopened = kv_rows(SQLiteStore(store.path))
+
+        store = SQLiteStore(store.path)
+        for i in range(3):
+            store.set("answers", str(i), "x", ttl=0.05)
+        time.sleep(0.1)
+        store.set("profiles", "a", "fica")
+        after_four = kv_rows(store)
+        store.set("profiles", "b", "fica")
+        after_writes = kv_rows(store)
+    finally:
+        store_module.PURGE_EVERY_WRITES = original
+
+    assert before == 3 and reopened == 0, f"Abrir o store deveria limpar as vencidas: {before} -> {reopened}"
+    assert after_four == 4 and after_writes == 2, f"A 5ª escrita deveria limpar as vencidas: {after_four} -> {after_writes}"
+
+    print("✅ Vencidas apagadas na abertura e após 5 escritas")
+    return True
+
+
+def hold_lock(path: str, hold: float) -> None:
+    with SQLiteStore(path).session_lock("s1"):
+        time.sleep(hold)
+
+
+def test_session_lock_across_processes():
+    print("\n" + "=" * 50)
+    print("TEST: lock de sessão vale entre processos")
+    store = new_store()
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(target=hold_lock, args=(store.path, 1.0))
+    process.start()
+
+    # Espera o outro processo pegar o lock
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        if store._conn().execute("SELECT COUNT(*) FROM locks").fetchone()[0]:
+            break
+        time.sleep(0.02)
+
+    start = time.perf_counter()
+    with store.session_lock("s1"):
+        waited = time.perf_counter() - start
+    process.join()
+
+    assert waited > 0.3, f"Deveria esperar o outro processo liberar: {waited:.2f}s"
+
+    print(f"✅ Esperou {waited:.2f}s pelo outro processo")
+    return True
+
+
+def main():
+    print("🧪 TESTES DO STORE COMPARTILHADO")
+    print("=" * 50)
+
+    tests = [
+        test_ttl,
+        test_history_roundtrip,
+        test_purge,
+        test_expired_rows_purged,
+        test_session_lock_across_processes,
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except AssertionError as e:
+            print(f"❌ FALHOU: {e}")
+            failed += 1
+        except Exception as e:
+            print(f"❌ ERRO: {e}")
+            failed += 1
+
+    print("\n" + "=" * 50)
+    print(f"📊 RESULTADO: {passed} passaram, {failed} falharam")
+
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -2,7 +2,13 @@
 Ferramentas para o agente Valorant Helper.
 Usa google_search do ADK para buscar dados em tempo real.
 """
+import csv
+import json
+import unicodedata
+from functools import lru_cache
 from typing import List, Optional
+
+import numpy as np
 from google.adk.tools import FunctionTool, google_search
 
 
@@ -29,10 +35,107 @@ ALL_AGENTS = [
 ]
 
 
+# Apelidos comuns -> nome oficial
+AGENT_ALIASES = {
+    "kj": "Killjoy",
+    "kay o": "KAY/O",
+    "kayo": "KAY/O",
+    "brim": "Brimstone",
+    "harbour": "Harbor",
+    "dl": "Deadlock",
+    "phx": "Phoenix",
+    "chamb": "Chamber",
+    "gecko": "Gekko",
+    "jet": "Jett",
+}
+
+# Nomes digitados mais curtos que isso só casam exatos ou por apelido: com até
+# 5 letras uma ou duas trocas já viram palavra comum ("open" -> Omen,
+# "viver" -> Viper, "agora" -> Astra)
+FUZZY_MIN_LENGTH = 6
+# A partir deste tamanho aceita distância 2 (antes, só 1)
+FUZZY_LONG_LENGTH = 7
+
+
+def normalize_agent_name(agent_name: str) -> str:
+    """Minúsculas, sem acentos e só letras/números ("KAY/O", "kay o" -> "kayo")."""
+    text = unicodedata.normalize("NFKD", agent_name.lower())
+    return "".join(c for c in text if c.isalnum() and not unicodedata.combining(c))
+
+
+# Índice pré-calculado: nome/apelido normalizado -> nome oficial
+AGENT_INDEX = {normalize_agent_name(name): name for name in ALL_AGENTS}
+AGENT_INDEX.update({normalize_agent_name(alias): name for alias, name in AGENT_ALIASES.items()})
+
+# Nome oficial -> role
+AGENT_ROLE_BY_NAME = {name: AGENT_ROLES[normalize_agent_name(name)] for name in ALL_AGENTS}
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein com limite: retorna max_distance + 1 assim que passar do limite."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+@lru_cache(maxsize=1024)
+def resolve_agent(agent_name: str) -> Optional[str]:
+    """
+    Resolve nome, apelido ou erro de digitação para o nome oficial do agente.
+    
+    Args:
+        agent_name: Nome como o usuário escreveu (ex: "killjoi", "kj", "Kay O")
+    
+    Returns:
+        Nome oficial (ex: "Killjoy") ou None se nada estiver perto o bastante
+    """
+    key = normalize_agent_name(agent_name)
+    if not key:
+        return None
+    if key in AGENT_INDEX:
+        return AGENT_INDEX[key]
+    if len(key) < FUZZY_MIN_LENGTH:
+        return None
+    
+    # Erro de digitação raramente troca a primeira letra
+    max_distance = 2 if len(key) >= FUZZY_LONG_LENGTH else 1
+    best_name, best_distance = None, max_distance + 1
+    for candidate, name in AGENT_INDEX.items():
+        if candidate[0] != key[0]:
+            continue
+        distance = edit_distance(key, candidate, best_distance - 1 if best_name else max_distance)
+        if distance < best_distance:
+            best_name, best_distance = name, distance
+    return best_name
+
+
+def suggest_agents(agent_name: str, limit: int = 3) -> List[str]:
+    """Agentes com nome mais parecido, para mensagens de erro."""
+    key = normalize_agent_name(agent_name)
+    distances = {}
+    for candidate, name in AGENT_INDEX.items():
+        distance = edit_distance(key, candidate, max(len(key), len(candidate)))
+        distances[name] = min(distance, distances.get(name, distance))
+    return sorted(distances, key=distances.get)[:limit]
+
+
 def get_agent_role(agent_name: str) -> str:
     """Retorna a role de um agente."""
-    normalized = agent_name.lower().replace("/", "").replace("-", "")
-    return AGENT_ROLES.get(normalized, "Unknown")
+    name = resolve_agent(agent_name)
+    return AGENT_ROLE_BY_NAME[name] if name else "Unknown"
 
 
 def get_all_maps() -> dict:
@@ -56,16 +159,15 @@ def analyze_team_composition(agents: List[str]) -> dict:
     if not agents:
         return {"error": "Lista de agentes é obrigatória"}
     
-    agents_normalized = [a.strip().title() for a in agents]
-    
     roles = {"Duelist": 0, "Controller": 0, "Initiator": 0, "Sentinel": 0}
     agent_details = []
     
-    for agent in agents_normalized:
-        role = get_agent_role(agent)
+    for agent in agents:
+        name = resolve_agent(agent)
+        role = AGENT_ROLE_BY_NAME[name] if name else "Unknown"
         if role in roles:
             roles[role] += 1
-        agent_details.append({"name": agent, "role": role})
+        agent_details.append({"name": name or agent.strip(), "role": role})
     
     issues = []
     suggestions = []
@@ -113,23 +215,308 @@ def get_agent_info(agent_name: str) -> dict:
     if not agent_name:
         return {"error": "Nome do agente é obrigatório"}
     
-    agent_normalized = agent_name.strip().title()
-    role = get_agent_role(agent_normalized)
+    name = resolve_agent(agent_name)
     
-    if role == "Unknown":
+    if name is None:
         return {
             "status": "error",
             "error": f"Agente '{agent_name}' não encontrado",
-            "available_agents": ALL_AGENTS
+            "suggestions": suggest_agents(agent_name)
         }
     
     return {
         "status": "ok",
-        "name": agent_normalized,
-        "role": role
+        "name": name,
+        "role": AGENT_ROLE_BY_NAME[name]
     }
 
 
+# === Análise em lote (datasets de scrim/VOD) ===
+# Cada comp vira uma linha de 5 inteiros (id do agente); roles, problemas e
+# notas são calculados com NumPy para o bloco inteiro de uma vez.
+ROLE_NAMES = ["Duelist", "Controller", "Initiator", "Sentinel"]
+TEAM_SIZE = 5
+BATCH_CHUNK_SIZE = 2048
+
+AGENT_ID_BY_NAME = {name: i for i, name in enumerate(ALL_AGENTS)}
+UNKNOWN_AGENT_ID = len(ALL_AGENTS)
+EMPTY_SLOT_ID = len(ALL_AGENTS) + 1
+
+# id do agente -> id da role (4 = Unknown, 5 = vaga vazia)
+ROLE_ID_BY_AGENT_ID = np.array(
+    [ROLE_NAMES.index(AGENT_ROLE_BY_NAME[name]) for name in ALL_AGENTS] + [4, 5],
+    dtype=np.int8,
+)
+
+# Regras na mesma ordem de analyze_team_composition: (problema, sugestão)
+BATCH_RULES = [
+    ("❌ Sem Controller - time sem smokes", "Adicione Omen, Clove ou Viper"),
+    ("⚠️ Sem Initiator - falta informação", "Adicione Sova, Fade ou Gekko"),
+    ("⚠️ Sem Sentinel - falta defesa de site", "Adicione Killjoy, Cypher ou Sage"),
+    ("⚠️ Sem Duelist - pode faltar entrada", None),
+    ("⚠️ 3+ Duelistas - composição muito agressiva", "Troque um Duelista por utility"),
+]
+
+
+def validate_composition(agents) -> list:
+    """
+    Confere uma comp: lista de até 5 nomes de agente (texto).
+    
+    Raises:
+        ValueError: se não for uma lista de textos ou tiver mais de 5 agentes
+    """
+    if not isinstance(agents, (list, tuple)):
+        raise ValueError("Comp deve ser uma lista de agentes (ex: [\"Jett\", \"Omen\"])")
+    if len(agents) > TEAM_SIZE:
+        raise ValueError(f"Comp com {len(agents)} agentes (máximo {TEAM_SIZE})")
+    if not all(isinstance(agent, str) for agent in agents):
+        raise ValueError("Cada agente da comp deve ser um texto")
+    return list(agents)
+
+
+def encode_compositions(compositions: List[List[str]]) -> np.ndarray:
+    """
+    Converte comps em uma matriz (n, 5) de ids de agente (vagas vazias no fim).
+    
+    Raises:
+        ValueError: se alguma comp for inválida (ver validate_composition)
+    """
+    encoded = np.full((len(compositions), TEAM_SIZE), EMPTY_SLOT_ID, dtype=np.int16)
+    for row, agents in enumerate(compositions):
+        try:
+            agents = validate_composition(agents)
+        except ValueError as e:
+            raise ValueError(f"Comp {row}: {e}")
+        for col, agent in enumerate(agents):
+            name = resolve_agent(agent)
+            encoded[row, col] = AGENT_ID_BY_NAME[name] if name else UNKNOWN_AGENT_ID
+    return encoded
+
+
+def _build_rule_outcomes() -> list:
+    """Problemas, sugestões, nota e veredito para cada combinação de regras (bitmask)."""
+    outcomes = []
+    for mask in range(2 ** len(BATCH_RULES)):
+        hits = [rule for bit, rule in enumerate(BATCH_RULES) if mask & (1 << bit)]
+        score = max(0, min(10, 10 - 2 * len(hits)))
+        outcomes.append((
+            [issue for issue, _ in hits],
+            [suggestion for _, suggestion in hits if suggestion],
+            score,
+            "Boa composição!" if score >= 7 else "Composição precisa de ajustes",
+        ))
+    return outcomes
+
+
+RULE_OUTCOMES = _build_rule_outcomes()
+RULE_BITS = 1 << np.arange(len(BATCH_RULES))
+
+
+def score_compositions(encoded: np.ndarray) -> tuple:
+    """
+    Calcula contagem de roles e regras violadas de todas as comps de uma vez.
+    
+    Returns:
+        (role_counts (n, 4), rule_masks (n,)) - o bitmask indexa RULE_OUTCOMES
+    """
+    role_ids = ROLE_ID_BY_AGENT_ID[encoded]
+    role_counts = np.stack([(role_ids == r).sum(axis=1) for r in range(len(ROLE_NAMES))], axis=1)
+    
+    duelists, controllers, initiators, sentinels = role_counts.T
+    issue_matrix = np.stack([
+        controllers == 0,
+        initiators == 0,
+        sentinels == 0,
+        duelists == 0,
+        duelists >= 3,
+    ], axis=1)
+    
+    rule_masks = issue_matrix @ RULE_BITS
+    return role_counts, rule_masks
+
+
+def _composition_item(item) -> tuple:
+    """(id, agentes, erro) de uma entrada do lote; entradas inválidas vêm com o erro e sem agentes."""
+    comp_id = None
+    agents = item
+    if isinstance(item, dict):
+        comp_id = item.get("id")
+        if "agents" not in item:
+            return comp_id, [], str(item.get("error") or "Comp sem o campo \"agents\"")
+        agents = item["agents"]
+    try:
+        return comp_id, validate_composition(agents), None
+    except ValueError as e:
+        return comp_id, [], str(e)
+
+
+def _iter_scored_chunks(compositions, chunk_size: int):
+    """
+    Agrupa as comps em blocos e pontua cada bloco de uma vez.
+    
+    Cada item do bloco é (id, agentes, erro); comps inválidas ocupam a linha
+    com vagas vazias e quem consome devolve o erro no lugar do resultado.
+    """
+    chunk = []
+    start = 0
+    
+    def score(items, start):
+        encoded = encode_compositions([agents for _, agents, _ in items])
+        role_counts, rule_masks = score_compositions(encoded)
+        # Converte uma vez para listas Python; quem consome só monta a saída
+        return start, items, encoded.tolist(), role_counts.tolist(), rule_masks.tolist()
+    
+    for item in compositions:
+        chunk.append(_composition_item(item))
+        if len(chunk) >= chunk_size:
+            yield score(chunk, start)
+            start += len(chunk)
+            chunk = []
+    
+    if chunk:
+        yield score(chunk, start)
+
+
+def _agent_names(ids: list, agents: list) -> list:
+    """Nomes oficiais a partir dos ids (nomes desconhecidos ficam como digitados)."""
+    if UNKNOWN_AGENT_ID in ids:
+        return [agents[col].strip() if i == UNKNOWN_AGENT_ID else ALL_AGENTS[i]
+                for col, i in enumerate(ids) if i != EMPTY_SLOT_ID]
+    return [ALL_AGENTS[i] for i in ids if i != EMPTY_SLOT_ID]
+
+
+def iter_composition_batch(compositions, chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    Analisa comps em blocos e gera um resultado (dict) por comp, na ordem de entrada.
+    
+    Args:
+        compositions: Iterável de listas de agentes ou de dicts {"id": ..., "agents": [...]}
+        chunk_size: Comps por bloco vetorizado (limita a memória)
+    """
+    for start, items, encoded, role_counts, rule_masks in _iter_scored_chunks(compositions, chunk_size):
+        for offset, (ids, counts, mask) in enumerate(zip(encoded, role_counts, rule_masks)):
+            comp_id, agents, error = items[offset]
+            if error:
+                result = {"index": start + offset, "error": error}
+                if comp_id is not None:
+                    result["id"] = comp_id
+                yield result
+                continue
+            issues, suggestions, score, verdict = RULE_OUTCOMES[mask]
+            result = {
+                "index": start + offset,
+                "agents": _agent_names(ids, agents),
+                "role_count": dict(zip(ROLE_NAMES, counts)),
+                "issues": issues[:],
+                "suggestions": suggestions[:],
+                "composition_score": score,
+                "verdict": verdict,
+            }
+            if comp_id is not None:
+                result["id"] = comp_id
+            yield result
+
+
+def iter_composition_batch_jsonl(compositions, chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    Mesmo resultado de iter_composition_batch, já serializado em JSON Lines.
+    
+    Os trechos de JSON (nome de cada agente, contagens de roles, resultado de
+    cada combinação de regras) são serializados uma vez e só concatenados.
+    """
+    outcome_json = [
+        json.dumps({"issues": i, "suggestions": s, "composition_score": sc, "verdict": v}, ensure_ascii=False)[1:-1]
+        for i, s, sc, v in RULE_OUTCOMES
+    ]
+    name_json = [json.dumps(name, ensure_ascii=False) for name in ALL_AGENTS]
+    counts_json = {}
+    
+    for start, items, encoded, role_counts, rule_masks in _iter_scored_chunks(compositions, chunk_size):
+        for offset, (ids, counts, mask) in enumerate(zip(encoded, role_counts, rule_masks)):
+            comp_id, agents, error = items[offset]
+            id_json = f'"id": {json.dumps(comp_id, ensure_ascii=False)}, ' if comp_id is not None else ""
+            
+            if error:
+                yield f'{{{id_json}"index": {start + offset}, "error": {json.dumps(error, ensure_ascii=False)}}}\n'
+                continue
+            
+            if UNKNOWN_AGENT_ID in ids:
+                names = json.dumps(_agent_names(ids, agents), ensure_ascii=False)
+            else:
+                names = "[" + ", ".join([name_json[i] for i in ids if i != EMPTY_SLOT_ID]) + "]"
+            
+            key = tuple(counts)
+            role_count = counts_json.get(key)
+            if role_count is None:
+                role_count = counts_json[key] = json.dumps(dict(zip(ROLE_NAMES, counts)))
+            
+            yield f'{{{id_json}"index": {start + offset}, "agents": {names}, "role_count": {role_count}, {outcome_json[mask]}}}\n'
+
+
+def analyze_compositions_batch(compositions: List[List[str]]) -> dict:
+    """
+    Analisa várias composições de time de uma vez (datasets de scrim/VOD).
+    
+    Args:
+        compositions: Lista de comps, cada uma uma lista de até 5 agentes
+            (ex: [["Jett", "Omen", "Sova", "Killjoy", "Sage"], ["Raze", "Viper", ...]])
+    """
+    if not compositions:
+        return {"error": "Lista de composições é obrigatória"}
+    if not isinstance(compositions, list):
+        return {"error": "compositions deve ser uma lista de comps"}
+    
+    results = list(iter_composition_batch(compositions))
+    return {
+        "status": "ok",
+        "total": len(results),
+        "results": results,
+    }
+
+
+def parse_compositions(lines, fmt: str = "jsonl"):
+    """
+    Lê comps linha a linha de JSON Lines ou CSV, sem carregar o arquivo todo.
+    
+    Args:
+        lines: Iterável de linhas de texto
+        fmt: "jsonl" (array de agentes ou {"id", "agents"} por linha) ou "csv"
+            (agentes por coluna; cabeçalho opcional, coluna "id" opcional)
+    
+    Linhas que não são JSON válido viram {"error": ...}: o lote continua e o
+    erro sai no resultado daquela linha.
+    """
+    if fmt == "csv":
+        reader = csv.reader(lines)
+        has_id = False
+        for row_number, row in enumerate(reader):
+            cells = [c.strip() for c in row if c.strip()]
+            if not cells:
+                continue
+            if row_number == 0 and (cells[0].lower() == "id" or not any(resolve_agent(c) for c in cells)):
+                has_id = cells[0].lower() == "id"
+                continue
+            if has_id:
+                yield {"id": cells[0], "agents": cells[1:]}
+            else:
+                yield cells
+        return
+    
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            item = {"error": f"Linha {line_number} não é JSON válido: {e}"}
+        yield item
+
+
+# === Funções locais registradas no Gemini (function calling nativo) ===
+LOCAL_FUNCTIONS = [get_all_maps, analyze_team_composition, get_agent_info]
+
+
 # === Exporta ferramentas para o agente ===
 # google_search é nativo do ADK - o agente vai usar para buscar tier list e meta
 tools = [
@@ -137,4 +524,5 @@ tools = [
     FunctionTool(get_all_maps),
     FunctionTool(analyze_team_composition),
     FunctionTool(get_agent_info),
+    FunctionTool(analyze_compositions_batch),
 ]
@@ -0,0 +1,221 @@
+"""
+Roteador local de intenções.
+Responde perguntas determinísticas (composição, role de agente, mapas ativos)
+direto pelas ferramentas locais, sem chamar o Gemini.
+"""
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import List
+
+from .agent_tools import (
+    ACTIVE_MAPS,
+    AGENT_ALIASES,
+    ALL_AGENTS,
+    analyze_team_composition,
+    get_agent_info,
+    get_all_maps,
+)
+
+
+# --- Rotas ---
+ROUTE_PROFILE = "profile"
+ROUTE_COMPOSITION = "composition"
+ROUTE_AGENT_INFO = "agent_info"
+ROUTE_MAPS = "maps"
+ROUTE_LLM = "llm"
+
+LOCAL_ROUTES = (ROUTE_COMPOSITION, ROUTE_AGENT_INFO, ROUTE_MAPS)
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sem acentos e sem '/' ou '-' (KAY/O -> kayo)."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[/\-]", "", text)
+
+
+def _compile_names(names: List[str]) -> re.Pattern:
+    """Compila uma alternação única (mais longos primeiro) com limites de palavra."""
+    alternatives = sorted({re.escape(n) for n in names}, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(alternatives) + r")\b")
+
+
+# Nome/apelido normalizado -> nome de exibição
+AGENT_DISPLAY = {normalize_text(name): name for name in ALL_AGENTS}
+AGENT_DISPLAY.update({normalize_text(alias): name for alias, name in AGENT_ALIASES.items()})
+
+# Autômatos pré-compilados (uma única passada sobre a mensagem)
+AGENT_PATTERN = _compile_names(list(AGENT_DISPLAY))
+MAP_PATTERN = _compile_names(ACTIVE_MAPS)
+
+COMPOSITION_WORDS = ["comp", "composicao", "analisa", "analise", "analisar", "avalia", "avaliar", "time", "lineup"]
+AGENT_INFO_WORDS = ["role", "funcao", "classe", "info", "informacao", "informacoes", "qual a", "que tipo"]
+
+COMPOSITION_KEYWORDS = _compile_names(COMPOSITION_WORDS)
+AGENT_INFO_KEYWORDS = _compile_names(AGENT_INFO_WORDS)
+MAPS_KEYWORDS = _compile_names(["mapa", "mapas"])
+MAPS_LIST_KEYWORDS = _compile_names(["ativo", "ativos", "pool", "rotacao", "quais", "lista", "listar", "disponiveis", "competitivo"])
+
+# Palavras que podem sobrar numa pergunta sobre agentes sem ser nome de agente.
+# Qualquer outra palavra que não resolva para um agente manda a mensagem ao Gemini
+FILLER_WORDS = set(" ".join(COMPOSITION_WORDS + AGENT_INFO_WORDS).split()) | {
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "no", "na", "um", "uma",
+    "com", "pra", "para", "por", "me", "minha", "meu", "nossa", "nosso", "essa", "esse",
+    "esta", "este", "ai", "ok", "favor", "pf", "pfv", "agente", "agentes", "nota",
+}
+
+# Uma composição tem no máximo 5 agentes
+TEAM_SIZE = 5
+
+# Qualquer um destes indica pergunta aberta -> Gemini
+OPEN_ENDED_KEYWORDS = _compile_names([
+    "contra", "counter", "vs", "recomenda", "recomende", "recomendacao", "sugere", "sugira",
+    "pickar", "pick", "pegar", "jogar", "devo", "melhor", "melhores", "meta", "tier",
+    "por que", "porque", "como", "quando", "dica", "dicas", "estrategia",
+])
+
+# Perguntas que dependem de dados atuais da web (meta, patch, cenário pro)
+WEB_SEARCH_KEYWORDS = _compile_names([
+    "meta", "tier", "tierlist", "patch", "atualizacao", "nerf", "nerfado", "buff", "buffado",
+    "pro", "pros", "vct", "champions", "masters", "campeonato", "noticia", "noticias",
+    "novo", "nova", "lancamento", "atual", "atualmente", "hoje", "2025", "melhor", "melhores",
+    "pickrate", "winrate", "ranked", "elo", "tracker",
+])
+
+
+def needs_web_search(message: str, has_image: bool = False) -> bool:
+    """Decide se a pergunta precisa de Google Search ou se as funções locais bastam."""
+    if has_image:
+        return True
+    return bool(WEB_SEARCH_KEYWORDS.search(normalize_text(message or "")))
+
+
+def _find_agents(text: str) -> tuple:
+    """
+    Agentes citados no texto normalizado, na ordem, e as palavras que sobraram.
+
+    Só nomes e apelidos exatos (do autômato) contam como agentes: o fuzzy do
+    resolve_agent confunde palavras comuns com agentes ("agora" -> Astra).
+    Sobras que não são palavras de ligação, inclusive erros de digitação como
+    "killjoi", são devolvidas como não resolvidas e levam a mensagem ao Gemini.
+
+    Returns:
+        (agentes, palavras não resolvidas, outras palavras)
+    """
+    found = [(m.start(), AGENT_DISPLAY[m.group(1)]) for m in AGENT_PATTERN.finditer(text)]
+    spans = [(m.start(), m.end()) for m in AGENT_PATTERN.finditer(text)]
+    unresolved = []
+    others = []
+
+    for word in re.finditer(r"[a-z0-9]+", text):
+        if any(start <= word.start() < end for start, end in spans):
+            continue
+        if word.group() in FILLER_WORDS or MAP_PATTERN.fullmatch(word.group()):
+            others.append(word.group())
+        else:
+            unresolved.append(word.group())
+
+    return [name for _, name in sorted(found)], unresolved, others
+
+
+def classify_intent(message: str) -> dict:
+    """
+    Classifica a mensagem em uma rota.
+
+    Returns:
+        Dict com 'route', 'agents' (nomes de exibição, na ordem) e 'maps'
+    """
+    text = normalize_text(message or "")
+
+    agents, unresolved, others = _find_agents(text)
+    maps = MAP_PATTERN.findall(text)
+    intent = {"route": ROUTE_LLM, "agents": agents, "maps": maps}
+
+    if not text.strip() or OPEN_ENDED_KEYWORDS.search(text):
+        return intent
+
+    # Palavra que pode ser um agente não reconhecido, ou time com mais de 5:
+    # responder localmente analisaria outra comp, então fica com o Gemini
+    if agents and (unresolved or len(agents) > TEAM_SIZE):
+        return intent
+
+    # Mensagem só com nomes ("Jett Omen Sova Killjoy Sage", "kj") dispensa palavra-chave
+    only_names = bool(agents) and not others
+
+    if len(agents) >= 2 and not maps:
+        if only_names or COMPOSITION_KEYWORDS.search(text):
+            intent["route"] = ROUTE_COMPOSITION
+    elif len(agents) == 1 and not maps:
+        if only_names or AGENT_INFO_KEYWORDS.search(text):
+            intent["route"] = ROUTE_AGENT_INFO
+    elif not agents and MAPS_KEYWORDS.search(text) and MAPS_LIST_KEYWORDS.search(text):
+        intent["route"] = ROUTE_MAPS
+
+    return intent
+
+
+def answer_locally(intent: dict) -> str:
+    """Executa a ferramenta da rota e formata a resposta em markdown."""
+    route = intent["route"]
+
+    if route == ROUTE_MAPS:
+        result = get_all_maps()
+        maps_str = "\n".join(f"• {m.capitalize()}" for m in result["maps"])
+        return f"🗺️ **Mapas Ativos no Competitivo** ({result['total']})\n\n{maps_str}"
+
+    if route == ROUTE_AGENT_INFO:
+        result = get_agent_info(intent["agents"][0])
+        if result.get("status") != "ok":
+            return f"❌ {result.get('error', 'Agente não encontrado')}"
+        return f"🎭 **{result['name']}** é **{result['role']}**"
+
+    if route == ROUTE_COMPOSITION:
+        result = analyze_team_composition(intent["agents"])
+        agents_str = ", ".join(f"{a['name']} ({a['role']})" for a in result["agents"])
+        roles_str = " | ".join(f"{role}: {count}" for role, count in result["role_count"].items())
+
+        response_text = f"""🧩 **Análise de Composição**
+
+👥 **Agentes:** {agents_str}
+📊 **Roles:** {roles_str}"""
+
+        if result["issues"]:
+            response_text += "\n\n⚠️ **Problemas:**\n" + "\n".join(f"• {i}" for i in result["issues"])
+        if result["suggestions"]:
+            response_text += "\n\n💡 **Sugestões:**\n" + "\n".join(f"• {s}" for s in result["suggestions"])
+
+        response_text += f"\n\n🏆 **Nota:** {result['composition_score']}/10 - {result['verdict']}"
+        return response_text
+
+    raise ValueError(f"Rota sem resposta local: {route}")
+
+
+# --- Contadores por rota ---
+_route_counts = Counter()
+_route_lock = threading.Lock()
+
+
+def record_route(route: str) -> None:
+    """Conta uma requisição atendida pela rota."""
+    with _route_lock:
+        _route_counts[route] += 1
+
+
+def get_route_stats() -> dict:
+    """Retorna quantas requisições cada rota atendeu."""
+    with _route_lock:
+        counts = dict(_route_counts)
+    total = sum(counts.values())
+    return {
+        "total": total,
+        "routes": counts,
+        "local_ratio": round(sum(counts.get(r, 0) for r in LOCAL_ROUTES) / total, 3) if total else 0.0,
+    }
+
+
+def reset_route_stats() -> None:
+    """Zera os contadores."""
+    with _route_lock:
+        _route_counts.clear()